@@ -0,0 +1,210 @@
+"""
+Situs fixture lokal mirip mamikos untuk benchmark offline.
+
+Listing per region dimuat lewat XHR JSON (jalur yang sama dengan mode capture),
+card dirender dengan markup roomCard / kostRoomCard sesuai SELECTORS, plus link
+load more. Halaman detail memuat semua field yang dibaca extract_card_detail.
+Latency, ukuran halaman, dan kegagalan bisa diatur.
+
+Contoh:
+    python -m bench.fixture_site --cards 120 --page-size 20 --latency-ms 80 --port 8766
+"""
+
+import time
+import random
+import argparse
+import threading
+from urllib.parse import unquote
+
+from tools.site_utils import render_detail_page, start_site_server
+
+LIST_PATH = "/garuda/stories/list"
+
+FACILITY_POOL = [
+    "WiFi", "AC", "Kasur", "Lemari Baju", "K. Mandi Dalam", "Kloset Duduk",
+    "Air panas", "Meja", "Kursi", "Jendela", "Parkir Motor", "Parkir Mobil",
+    "Dapur", "Kulkas", "Mesin Cuci", "CCTV", "Penjaga Kos", "Akses 24 Jam",
+    "Laundry", "Ruang Jemur", "TV", "Dispenser", "Listrik token", "Bantal",
+]
+RULE_POOL = [
+    "Tidak boleh bawa hewan", "Tamu dilarang menginap", "Akses 24 jam",
+    "Maks. 2 orang/kamar", "Dilarang merokok di kamar", "Khusus karyawan",
+]
+LANDMARK_POOL = [
+    "Universitas Stub", "Stasiun Fixture", "Pasar Bench", "RS Lokal",
+    "Mall Sintetis", "Halte Busway", "Masjid Raya", "Taman Kota",
+]
+
+class FixtureSite:
+    """
+    Sumber data tools.site_utils: data sintetis deterministik per (region, index)
+    + parameter gangguan.
+
+    - cards         : jumlah listing per region
+    - page_size     : card per payload / klik load more
+    - latency_ms    : delay tiap request (+ jitter_ms acak)
+    - fail_rate     : peluang halaman detail balas HTTP 500
+    - fail_mode     : "transient" (hanya request pertama per URL) / "permanent"
+    - section_delay_ms : section detail (fasilitas, aturan, landmark, alamat) muncul belakangan
+    - markup        : data-testid card, "roomCard" atau "kostRoomCard"
+    """
+
+    def __init__(
+        self,
+        cards=60,
+        page_size=20,
+        latency_ms=0,
+        jitter_ms=0,
+        fail_rate=0.0,
+        fail_mode="transient",
+        section_delay_ms=0,
+        markup="roomCard",
+        seed=0,
+    ):
+        self.cards = cards
+        self.page_size = max(1, page_size)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.fail_mode = fail_mode
+        self.section_delay_ms = section_delay_ms
+        self.markup = markup
+        self.card_testid = markup
+        self.list_path = LIST_PATH
+        self.seed = seed
+        self.requests = 0
+        self.failures = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, *parts):
+        return random.Random("|".join(str(p) for p in (self.seed,) + parts))
+
+    def before_request(self):
+        with self._lock:
+            self.requests += 1
+        self.delay()
+
+    def delay(self):
+        jitter = random.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+        if self.latency_ms or jitter:
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def room(self, region, index, host):
+        rng = self._rng(region, index)
+        return {
+            "share_url": f"http://{host}/room/{region}/{index}",
+            "room-title": f"Kos Bench {region.split('-')[0].title()} {index}",
+            "price_title_format": {"price": f"Rp{rng.randint(5, 40) * 100}.000"},
+            "rating": f"{rng.uniform(3.5, 5):.1f}",
+        }
+
+    def listing_payload(self, region, page, host):
+        start = (page - 1) * self.page_size
+        end = min(start + self.page_size, self.cards)
+        rooms = [self.room(region, i, host) for i in range(start, end)] if start < self.cards else []
+        return {"rooms": rooms, "page": page, "has-more": end < self.cards}
+
+    def listing_cards(self, region, page, host):
+        payload = self.listing_payload(region, page, host)
+        cards = [
+            {
+                "url": room["share_url"],
+                "name": room["room-title"],
+                "price": room["price_title_format"]["price"],
+                "rating": room["rating"],
+            }
+            for room in payload["rooms"]
+        ]
+        return cards, payload["has-more"]
+
+    def should_fail(self, path):
+        if not self.fail_rate:
+            return False
+        with self._lock:
+            attempt = self._attempts.get(path, 0)
+            self._attempts[path] = attempt + 1
+        if self.fail_mode == "transient" and attempt > 0:
+            return False
+        failed = self._rng("fail", path).random() < self.fail_rate
+        if failed:
+            with self._lock:
+                self.failures += 1
+        return failed
+
+    def detail_page(self, path, host):
+        parts = [unquote(p) for p in path.split("/") if p]
+        if len(parts) != 3 or parts[0] != "room" or not parts[2].isdigit():
+            return None
+        region, index = parts[1], int(parts[2])
+        if index >= self.cards:
+            return None
+        if self.should_fail(path):
+            return 500, "fixture failure"
+        room = self.room(region, index, host)
+        rng = self._rng("detail", region, index)
+        facilities = rng.sample(FACILITY_POOL, rng.randint(6, 14))
+        rules = rng.sample(RULE_POOL, rng.randint(1, 4))
+        landmarks = rng.sample(LANDMARK_POOL, rng.randint(2, 5))
+        return 200, render_detail_page(
+            room["room-title"],
+            room["price_title_format"]["price"],
+            room["rating"],
+            gender=rng.choice(["Putra", "Putri", "Campur"]),
+            area=region.split("-")[0].title(),
+            reviews=rng.randint(0, 300),
+            transactions=rng.randint(0, 500),
+            address=f"Jl. Fixture No. {index}, {region}",
+            facilities=facilities,
+            rules=rules,
+            landmarks=[
+                (name, f"{str(rng.randint(1, 40) / 10).replace('.', ',')} km")
+                for name in landmarks
+            ],
+            section_delay_ms=self.section_delay_ms,
+        )
+
+
+def add_site_arguments(parser):
+    """Argumen fixture yang dipakai bersama fixture_site & run_bench."""
+    parser.add_argument("--cards", type=int, default=60, help="Listing per region")
+    parser.add_argument("--page-size", type=int, default=20, help="Card per klik load more")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay tiap request (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Jitter acak tambahan (ms)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Peluang detail balas 500")
+    parser.add_argument(
+        "--fail-mode", choices=["transient", "permanent"], default="transient",
+        help="transient = hanya request pertama per URL yang gagal",
+    )
+    parser.add_argument("--section-delay-ms", type=int, default=0, help="Delay render section detail")
+    parser.add_argument("--markup", choices=["roomCard", "kostRoomCard"], default="roomCard")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def site_from_args(args):
+    return FixtureSite(
+        cards=args.cards,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        fail_rate=args.fail_rate,
+        fail_mode=args.fail_mode,
+        section_delay_ms=args.section_delay_ms,
+        markup=args.markup,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixture site lokal untuk benchmark scraper")
+    add_site_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server, base_url = start_site_server(site_from_args(args), args.host, args.port)
+    print(f"  * [Fixture site: {base_url}/cari/<region> | {args.cards} cards/region]")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,234 @@
+"""
+Benchmark end-to-end scrape_mamikos_single terhadap fixture site lokal (tanpa internet).
+
+Semua path output dialihkan ke folder sementara, jadi data/ asli tidak tersentuh.
+Laporan: cards/detik, latency per card p50/p95 (navigasi detail -> selesai ekstrak),
+peak RSS proses Python dan total bersama driver + Chromium (sampling /proc, Linux).
+
+Contoh:
+    python -m bench.run_bench --regions 2 --cards 100 --latency-ms 50 --concurrency 4
+    python -m bench.run_bench --fail-rate 0.1 --capture --output bench/report.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import threading
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.config import SCRAPER_CONFIG, BROWSER_CONFIG, PATHS
+from tools import scrape_utils
+from tools.metrics_utils import build_run_report
+from tools.browser_utils import process_tree, rss_kb
+from bench.fixture_site import add_site_arguments, site_from_args
+from tools.site_utils import start_site_server
+
+
+def percentile(values, pct):
+    """Percentile nearest-rank; 0.0 untuk list kosong."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CardTimer:
+    """
+    Catat latency per card dengan membungkus open_card_detail & extract_card_detail
+    di tools.scrape_utils (dipanggil lewat global modul oleh scrape_cards_concurrent).
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self._started = {}
+        self._originals = None
+
+    def install(self):
+        open_card_detail = scrape_utils.open_card_detail
+        extract_card_detail = scrape_utils.extract_card_detail
+        self._originals = (open_card_detail, extract_card_detail)
+
+        def timed_open(url, tab, *args, **kwargs):
+            self._started[id(tab)] = time.perf_counter()
+            return open_card_detail(url, tab, *args, **kwargs)
+
+        def timed_extract(new_page, *args, **kwargs):
+            room_data = extract_card_detail(new_page, *args, **kwargs)
+            started = self._started.pop(id(new_page), None)
+            if started is not None:
+                self.latencies.append(time.perf_counter() - started)
+            return room_data
+
+        scrape_utils.open_card_detail = timed_open
+        scrape_utils.extract_card_detail = timed_extract
+
+    def uninstall(self):
+        if self._originals:
+            scrape_utils.open_card_detail, scrape_utils.extract_card_detail = self._originals
+
+
+def redirect_paths(workdir):
+    """Arahkan semua PATHS di bawah data/ dan profile browser ke folder benchmark."""
+    for key, value in PATHS.items():
+        if value == "data" or value.startswith("data/"):
+            PATHS[key] = os.path.join(workdir, value[len("data") :].lstrip("/"))
+    BROWSER_CONFIG["user_data_dir"] = os.path.join(workdir, "profile")
+
+
+class RssSampler(threading.Thread):
+    """
+    Sampling RSS proses ini + semua child (driver Playwright & Chromium) tiap
+    interval detik. Peak total lebih jujur dari ru_maxrss karena Chromium
+    adalah cucu yang belum tentu sudah di-reap saat benchmark selesai.
+    """
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_self_kb = 0
+        self.peak_tree_kb = 0
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        pid = os.getpid()
+        self_kb = rss_kb(pid)
+        tree_kb = self_kb + sum(rss_kb(child) for child in process_tree(pid) if child != pid)
+        self.peak_self_kb = max(self.peak_self_kb, self_kb)
+        self.peak_tree_kb = max(self.peak_tree_kb, tree_kb)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+def count_records(regions_folder):
+    total = 0
+    for name in os.listdir(regions_folder):
+        if name.endswith(".json"):
+            with open(os.path.join(regions_folder, name), "r", encoding="utf-8") as f:
+                total += len(json.load(f))
+    return total
+
+
+def run_benchmark(args):
+    site = site_from_args(args)
+    server, base_url = start_site_server(site)
+    host, port = server.server_address[:2]
+
+    workdir = tempfile.mkdtemp(prefix="mamikos-bench-")
+    redirect_paths(workdir)
+    SCRAPER_CONFIG["base_url"] = f"{base_url}/cari"
+    SCRAPER_CONFIG["connectivity"] = dict(
+        SCRAPER_CONFIG["connectivity"], host=host, port=port, target_url=f"{base_url}/"
+    )
+    SCRAPER_CONFIG["rate_control"] = dict(
+        SCRAPER_CONFIG["rate_control"],
+        enabled=bool(args.rate),
+        initial_rate=args.rate or 1.0,
+        max_rate=max(args.rate, SCRAPER_CONFIG["rate_control"]["max_rate"]),
+    )
+    SCRAPER_CONFIG["completed_region_threshold"] = 10**9
+    SCRAPER_CONFIG["listing_capture"]["enabled"] = args.capture
+    BROWSER_CONFIG["channel"] = args.channel
+    BROWSER_CONFIG["headless"] = not args.headed
+
+    # Import setelah config diubah; scraper butuh patchright
+    from scraper import scrape_mamikos_single
+
+    region_list = [f"bench-region-{i + 1}" for i in range(args.regions)]
+    timer = CardTimer()
+    timer.install()
+    sampler = RssSampler()
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        region_stats = scrape_mamikos_single(
+            region_list,
+            force=True,
+            backup_interval=args.backup_interval,
+            dedup=True,
+            concurrency=args.concurrency,
+            listing_capture=args.capture,
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        timer.uninstall()
+        server.shutdown()
+
+    records = count_records(PATHS["regions_folder"])
+    metrics = build_run_report()
+    report = {
+        "params": {
+            key: getattr(args, key)
+            for key in (
+                "regions", "cards", "page_size", "latency_ms", "jitter_ms", "fail_rate",
+                "fail_mode", "section_delay_ms", "markup", "concurrency", "capture", "rate",
+            )
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "records": records,
+        "expected_records": args.regions * args.cards,
+        "cards_per_second": round(records / elapsed, 3) if elapsed else 0.0,
+        "card_latency_p50": round(percentile(timer.latencies, 50), 3),
+        "card_latency_p95": round(percentile(timer.latencies, 95), 3),
+        "card_samples": len(timer.latencies),
+        "peak_rss_python_mb": round(sampler.peak_self_kb / 1024, 1),
+        "peak_rss_total_mb": round(sampler.peak_tree_kb / 1024, 1),
+        "fixture_requests": site.requests,
+        "fixture_failures": site.failures,
+        "phases": metrics["phases"],
+        "counters": metrics["counters"],
+        "regions": region_stats,
+    }
+    if args.keep:
+        report["workdir"] = workdir
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def parse_bench_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scraper offline dengan fixture site lokal")
+    add_site_arguments(parser)
+    parser.add_argument("--regions", type=int, default=1, help="Jumlah region sintetis")
+    parser.add_argument("--concurrency", type=int, default=None, help="Tab detail paralel")
+    parser.add_argument("--capture", action="store_true", help="Pakai mode capture XHR")
+    parser.add_argument("--backup-interval", type=int, default=None)
+    parser.add_argument(
+        "--rate", type=float, default=0.0, help="Rate awal controller (req/detik), 0 = tanpa pacing"
+    )
+    parser.add_argument("--channel", default="chromium", help="Channel browser (default: chromium)")
+    parser.add_argument("--headed", action="store_true", help="Tampilkan browser")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus folder output benchmark")
+    parser.add_argument("--output", default=None, help="Simpan laporan JSON ke file ini")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_bench_args()
+    report = run_benchmark(args)
+    print("+===+ \n \n+===+\n# Benchmark\n+===+")
+    for key in (
+        "elapsed_seconds", "records", "expected_records", "cards_per_second",
+        "card_latency_p50", "card_latency_p95", "peak_rss_python_mb", "peak_rss_total_mb",
+        "fixture_requests", "fixture_failures",
+    ):
+        print(f"  > {key}: {report[key]}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"  > Report saved: {args.output}")
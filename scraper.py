@@ -1,24 +1,81 @@
-from patchright.sync_api import sync_playwright
 import os
-import sys
 import json
-import random
+import sys
 import time
+from contextlib import closing
+from datetime import datetime
+
+from tools.cli_utils import parse_args
+from tools.command_utils import run_offline_command
+
+if __name__ == "__main__":
+    # Command offline (merge/stats/validate/...) di-dispatch sebelum modul scraping
+    # (browser, jaringan, worker, dst) di-import, supaya start-up-nya tetap cepat
+    args = parse_args()
+    if args.command not in ("scrape", "retry-failed"):
+        sys.exit(run_offline_command(args))
 
 from regions import regions
 from tools.config import SCRAPER_CONFIG, BROWSER_CONFIG, PATHS, SELECTORS
-from tools.cli_utils import parse_args
-from tools.net_utils import check_internet
+from tools.net_utils import start_connectivity_monitor, stop_connectivity_monitor
+from tools.capture_utils import ListingCapture
+from tools.browser_utils import BrowserManager, format_block_stats, BLOCK_STATS
+from tools.rate_utils import configure_rate_controller
+from tools.metrics_utils import span, incr, observe, set_region, write_metrics, format_phase_summary
+from tools.worker_utils import run_workers
+from tools.scheduler_utils import plan_regions, region_is_complete
+from tools.pagination_utils import PaginationController, paginate_listing
 from tools import parse_utils
-from tools.selector_utils import detect_room_card_selector, get_room_cards
+from tools.selector_utils import (
+    detect_room_card_selector,
+    get_room_card_summaries,
+    card_fingerprint,
+    wait_for_card_count,
+)
+from tools.journal_utils import RegionJournal
+from tools.state_utils import CrawlState
+from tools.dedup_utils import DedupIndex
 from tools.scrape_utils import (
-    backup_region,
-    save_region,
-    save_failed_cards,
-    scrape_card_detail,
+    make_dedup_key,
+    is_duplicate,
+    load_previous_records,
+    scrape_cards_concurrent,
     retry_failed_cards,
-    generate_master_file,  # <-- tambah import
 )
+from tools.retry_utils import (
+    RetryQueue,
+    save_dead_letters,
+    load_dead_letters,
+    dead_letter_regions,
+)
+from tools.master_utils import generate_master_file
+
+
+def open_dedup_index():
+    bloom_config = SCRAPER_CONFIG.get("dedup_bloom", {})
+    return DedupIndex(
+        PATHS["dedup_index_db"],
+        bloom_path=PATHS["dedup_bloom"] if bloom_config.get("enabled") else None,
+        bloom_capacity=bloom_config.get("capacity", 1_000_000),
+        bloom_error_rate=bloom_config.get("error_rate", 0.001),
+    )
+
+
+def release_orphaned_dedup_owners(dedup_index, crawl_state):
+    """
+    Region pemilik di dedup index yang file region-nya sudah tidak ada (dan tidak
+    sedang di-scrape) melepas semua listing-nya, supaya tidak di-skip selamanya.
+    """
+    released = 0
+    for owner in dedup_index.owner_regions():
+        if os.path.exists(f"{PATHS['regions_folder']}/{owner}.json"):
+            continue
+        manifest = crawl_state.region_manifest(owner)
+        if manifest is not None and manifest["status"] == "in_progress":
+            continue
+        released += dedup_index.release_region(owner)
+    if released:
+        print(f"  * [Dedup: {released} listing dilepas dari region yang file-nya hilang]")
 
 
 def scrape_mamikos_single(
@@ -28,20 +85,23 @@ def scrape_mamikos_single(
     limit_loadmore=None,
     backup_interval=None,
     dedup=True,
+    concurrency=None,
+    listing_capture=None,
 ):
-    browser = (
-        sync_playwright()
-        .start()
-        .chromium.launch_persistent_context(
-            user_data_dir=BROWSER_CONFIG["user_data_dir"],
-            channel=BROWSER_CONFIG["channel"],
-            headless=BROWSER_CONFIG["headless"],
-            no_viewport=BROWSER_CONFIG["no_viewport"],
-        )
-    )
+    # Import lazy: command offline (merge/stats/validate/...) tidak butuh patchright
+    from patchright.sync_api import sync_playwright
+
+    playwright = sync_playwright().start()
+    # Persistent context + tab detail; restart otomatis setelah N halaman / RSS terlalu besar
+    browser = BrowserManager(playwright, BROWSER_CONFIG).start()
     
     # ❌ REMOVE: results = []  # Tidak perlu lagi accumulate di memory
     seen_keys = set()
+    region_stats = []  # Ringkasan per region (bukan data), dipakai mode --workers
+    crawl_state = CrawlState(PATHS["crawl_state_db"])
+    dedup_index = open_dedup_index() if dedup else None
+    if dedup_index is not None:
+        release_orphaned_dedup_owners(dedup_index, crawl_state)
 
     backup_interval = (
         backup_interval
@@ -54,54 +114,61 @@ def scrape_mamikos_single(
         else SCRAPER_CONFIG["max_load_more_clicks"]
     )
     completed_region_threshold = SCRAPER_CONFIG["completed_region_threshold"]
+    refresh_after_hours = SCRAPER_CONFIG.get("scheduler", {}).get("refresh_after_hours")
     scroll_pause = SCRAPER_CONFIG.get("scroll_pause", [1 / 3, 2 / 3, 1, 0])
+    # Semua navigasi & klik lewat satu rate controller (token bucket + AIMD)
+    rate = configure_rate_controller(SCRAPER_CONFIG.get("rate_control"))
+    # Probe koneksi & site di thread background; scraping cuma cek state circuit breaker
+    monitor = start_connectivity_monitor(
+        SCRAPER_CONFIG.get("connectivity"), SCRAPER_CONFIG["base_url"]
+    )
+
+    def before_request():
+        monitor.wait_until_healthy()
+        rate.acquire()
+    capture_config = dict(SCRAPER_CONFIG.get("listing_capture", {}))
+    if listing_capture is not None:
+        capture_config["enabled"] = listing_capture
     max_card_retry = SCRAPER_CONFIG.get("max_card_retry", 2)
     duplicate_exit_threshold = SCRAPER_CONFIG.get("duplicate_exit_threshold", 20)
+    concurrency = (
+        concurrency
+        if concurrency is not None
+        else SCRAPER_CONFIG.get("detail_concurrency", 1)
+    )
 
     # Ensure all necessary folders exist
     for path_key, path_value in PATHS.items():
         if "folder" in path_key or "dir" in path_key:
             os.makedirs(path_value, exist_ok=True)
 
+    # region_list boleh iterable/generator (mis. RegionQueue.iter_claims mode --workers)
     for region in region_list:
         print("+===+ \n \n+===+")
-        # Cek koneksi internet sebelum scraping region, maksimal 3 kali
-        retry_count = 0
-        max_retry = SCRAPER_CONFIG.get("max_connection_retry", 3)
-        while not check_internet():
-            retry_count += 1
-            print("  X [ERROR: No Internet Connection | Retrying in 10 seconds]")
-            if retry_count >= max_retry:
-                print(f"  X [FATAL: Failed to connect | Max attempts: {max_retry}]")
-                print(
-                    "    > Make sure your computer is connected to the internet, then restart the scraper"
-                )
-                print(
-                    "+===+ \n \n+===+ \n# Scraping Canceled: No Internet Connection\n+===+ \n \n+===+"
-                )
-                browser.close()
-                sys.exit(1)
-            time.sleep(SCRAPER_CONFIG.get("internet_retry_sleep", 10))
+        set_region(region)
+        region_started = time.perf_counter()
+        # Circuit open (koneksi putus) -> pause di sini sampai pulih; saat sehat tanpa probe
+        monitor.wait_until_healthy()
         region_path = f"{PATHS['regions_folder']}/{region}.json"
         skip_region = False
-        if os.path.exists(region_path):
+        # Keputusan skip cukup lookup manifest di crawl state; region file lama dibaca sekali saja
+        region_state = crawl_state.region_manifest(region)
+        if region_state is None:
             try:
-                with open(region_path, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-                if (
-                    isinstance(existing_data, list)
-                    and len(existing_data) > completed_region_threshold
-                    and not force
-                ):
-                    print(
-                        f"  X [Skip Region: {region} | Sum Data: {len(existing_data)}]"
-                    )
-                    skip_region = True
+                region_state = crawl_state.backfill_region(region, region_path)
             except Exception as e:
                 print(f"  X [Warning: Fail to read {region}: {e}]")
+        if not force and region_is_complete(
+            region_state, completed_region_threshold, refresh_after_hours
+        ):
+            print(f"  X [Skip Region: {region} | Sum Data: {region_state['records']}]")
+            skip_region = True
         if skip_region:
+            region_stats.append({"region": region, "status": "skipped"})
             continue
 
+        browser.maybe_recycle()
+        browser.note_pages()
         page = browser.new_page()
         print(f"# Scraping region: {region}")
 
@@ -109,133 +176,438 @@ def scrape_mamikos_single(
             base_url=SCRAPER_CONFIG["base_url"], region=region
         )
 
-        try:
-            page.goto(url, timeout=SCRAPER_CONFIG["page_timeout"])
-        except Exception as e:
-            print(f"    X [Error opening region: {e} | URL: {url}]")
-            page.close()
-            continue
+        # Mode capture: card diambil dari response JSON listing, bukan dari DOM
+        capture = None
+        if capture_config.get("enabled"):
+            capture = ListingCapture(
+                page,
+                capture_config,
+                SCRAPER_CONFIG["base_url"],
+                # Rekaman per region: stub server memutar ulang satu region
+                f"{PATHS['capture_folder']}/{region}" if capture_config.get("record") else None,
+            )
 
-        # Klik load more jika ada
-        loadmore_count = 0
-        while True:
+        list_error = None
+        for attempt in range(2):
             try:
-                page.wait_for_selector(
-                    SELECTORS["load_more_link"], timeout=SCRAPER_CONFIG["load_timeout"]
-                )
-                page.locator(SELECTORS["load_more_link"]).scroll_into_view_if_needed()
-                page.click(
-                    SELECTORS["load_more_link"], timeout=SCRAPER_CONFIG["page_timeout"]
-                )
-                loadmore_count += 1
-                print(f"    * [Load More: {loadmore_count}]")
-                time.sleep(random.uniform(1, 4))
-                if loadmore_count >= max_loadmore:
-                    print(f"    * [Max Load More reached: {max_loadmore}]")
-                    break
-            except Exception:
+                before_request()
+                with span("list_goto"):
+                    response = page.goto(
+                        url,
+                        timeout=SCRAPER_CONFIG["page_timeout"],
+                        wait_until="domcontentloaded" if capture else "load",
+                    )
+                status = rate.check_response(response)
+                if status is not None:
+                    raise RuntimeError(f"HTTP {status} on region page")
+                rate.on_success()
+                list_error = None
                 break
-
-        # ===============================
-        # DYNAMIC SELECTOR DETECTION
-        # ===============================
-        room_card_selector = detect_room_card_selector(page, SELECTORS, SCRAPER_CONFIG["load_timeout"])
-        if not room_card_selector:
-            print(f"    X [Error: No room cards found in region {region}]")
-            print(f"      Tried selectors: {SELECTORS['room_card_primary']}, {SELECTORS['room_card_fallback']}")
+            except Exception as e:
+                list_error = e
+                if "Timeout" in type(e).__name__:
+                    rate.on_error("timeout")
+                # Error jaringan: tunggu koneksi pulih lalu coba sekali lagi
+                if not monitor.report_error(e):
+                    break
+        if list_error is not None:
+            print(f"    X [Error opening region: {list_error} | URL: {url}]")
             page.close()
+            region_stats.append({"region": region, "status": "error", "error": str(list_error)})
             continue
-        
-        # Ambil cards dengan selector yang berhasil
-        cards = get_room_cards(page, room_card_selector)
-        print(f"  > Found {len(cards)} cards")
-
-        region_results = []
-        backup_round = 0
-        card_iter = cards[:limit_card] if limit_card else cards
-        duplicate_count = 0
-        failed_cards = []
-        failed_cards_info = []
 
-        # --- LOOP UTAMA: SCRAPE CARD ---
-        for idx, card in enumerate(card_iter):
-            try:
-                room_data = scrape_card_detail(
-                    card, page, scroll_pause, SELECTORS, parse_utils
+        room_card_selector = None
+        if capture is not None:
+            with span("listing_capture_wait"):
+                captured = capture.wait_for_count(0, SCRAPER_CONFIG["load_timeout"])
+        if capture is not None and captured:
+            print(f"    * [Using JSON capture: {len(capture.summaries)} cards]")
+        else:
+            if capture is not None:
+                print("    X [No listing payload captured, fallback to DOM]")
+                capture.detach()
+                capture = None
+            # ===============================
+            # DYNAMIC SELECTOR DETECTION
+            # ===============================
+            with span("selector_detect"):
+                room_card_selector = detect_room_card_selector(
+                    page, SELECTORS, SCRAPER_CONFIG["load_timeout"]
                 )
-                dedup_key = (
-                    (room_data.get("nama_kos") or "").strip().lower(),
-                    (room_data.get("area") or "").strip().lower(),
-                    (room_data.get("alamat") or "").strip().lower(),
-                )
-                if not all(dedup_key):
-                    print(f"    X [Warning: Data kosong pada field dedup: {dedup_key}]")
-                if dedup and dedup_key in seen_keys:
-                    print(
-                        f"    X [DUPLICATE: {room_data.get('nama_kos','')} ({room_data.get('area','')} - {room_data.get('alamat','')})]"
-                    )
-                    duplicate_count += 1
-                    if duplicate_count > duplicate_exit_threshold:
-                        print(
-                            "    X [Too much duplicate, stopping region scrape!]"
-                        )
-                        break
+            if not room_card_selector:
+                print(f"    X [Error: No room cards found in region {region}]")
+                print(f"      Tried selectors: {SELECTORS['room_card_primary']}, {SELECTORS['room_card_fallback']}")
+                page.close()
+                region_stats.append({"region": region, "status": "error", "error": "no room cards"})
+                continue
+
+        # Klik load more sampai list habis / plateau / cukup untuk --limit-card
+        if capture is not None:
+            count_cards = lambda: len(capture.summaries)
+            wait_for_growth = lambda n: capture.wait_for_count(n, SCRAPER_CONFIG["load_timeout"])
+        else:
+            count_cards = lambda: page.locator(room_card_selector).count()
+            wait_for_growth = lambda n: wait_for_card_count(
+                page, room_card_selector, n, SCRAPER_CONFIG["load_timeout"]
+            )
+        pagination = paginate_listing(
+            page,
+            SELECTORS["load_more_link"],
+            count_cards,
+            wait_for_growth,
+            PaginationController(
+                max_loadmore,
+                target_count=limit_card,
+                plateau_patience=SCRAPER_CONFIG["load_more_plateau_patience"],
+            ),
+            link_timeout=SCRAPER_CONFIG["load_more_link_timeout"],
+            first_link_timeout=SCRAPER_CONFIG["load_timeout"],
+            click_timeout=SCRAPER_CONFIG["page_timeout"],
+            before_click=before_request,
+        )
+
+        # Ambil URL detail + fingerprint semua card sekaligus, lalu list page tidak dipakai lagi
+        if capture is not None:
+            card_summaries = list(capture.summaries)
+            capture.detach()
+        else:
+            with span("card_summaries"):
+                card_summaries = get_room_card_summaries(page, room_card_selector, SELECTORS)
+        card_urls = [summary["url"] for summary in card_summaries]
+        card_fps = {summary["url"]: card_fingerprint(summary) for summary in card_summaries}
+        print(f"  > Found {len(card_urls)} cards")
+        page.close()
+
+        card_iter = card_urls[:limit_card] if limit_card else card_urls
+        duplicate_count = 0
+        # Card gagal diantrikan per URL (backoff + dead letter), bukan retry langsung
+        retry_queue = RetryQueue.from_config(
+            region, SCRAPER_CONFIG.get("retry_queue"), max_attempts=max_card_retry
+        )
+
+        # Region selesai sebelumnya / --force -> mulai dari nol; in_progress -> resume
+        if force or region_state is None or region_state["status"] == "completed":
+            crawl_state.reset_region(region)
+        crawl_state.add_pending(region, card_iter)
+
+        # Journal JSONL per region; sisa run yang terhenti ikut dipulihkan.
+        # Listing baru ditandai done setelah batch-nya benar-benar tertulis.
+        # room_data["url"] = URL card list page, key yang sama dengan crawl state.
+        journal = RegionJournal(
+            region,
+            PATHS["backup_folder"],
+            flush_every=backup_interval,
+            fsync_every=SCRAPER_CONFIG.get("journal_fsync_every", 1),
+            on_flush=lambda records, region=region: crawl_state.mark_done(
+                region, [r.get("url") for r in records]
+            ),
+        )
+        region_results = list(journal.recovered)
+        recovered_urls = {r.get("url") for r in region_results}
+        for room_data in region_results:
+            seen_keys.add(make_dedup_key(room_data))
+        remaining_urls = set(crawl_state.remaining(region, card_iter)) - recovered_urls
+        if len(remaining_urls) < len(card_iter):
+            print(f"  > Resume: {len(card_iter) - len(remaining_urls)} cards already done")
+        card_iter = [u for u in card_iter if u in remaining_urls or not u]
+
+        # Listing yang sudah dimiliki region lain (run sebelumnya) tidak perlu dibuka
+        if dedup_index is not None:
+            owned_elsewhere = set()
+            for u in card_iter:
+                if dedup_index.url_owner(u) not in (None, region):
+                    owned_elsewhere.add(u)
+            if owned_elsewhere:
+                print(f"  > Skip {len(owned_elsewhere)} cards already scraped in other regions")
+                # Tercatat skipped supaya crawl state tidak menyisakan pending palsu
+                crawl_state.mark_skipped(region, owned_elsewhere, "owned by other region")
+                card_iter = [u for u in card_iter if u not in owned_elsewhere]
+
+        # Fingerprint list page sama dengan run sebelumnya -> pakai record lama,
+        # cukup refresh scraped_at tanpa buka halaman detail
+        if SCRAPER_CONFIG.get("fingerprint_skip", True):
+            stored_fps = crawl_state.get_fingerprints(region)
+            candidates = [u for u in card_iter if u and stored_fps.get(u) == card_fps.get(u)]
+            previous_records = load_previous_records(region_path) if candidates else {}
+            unchanged = set()
+            for u in candidates:
+                room_data = previous_records.get(u)
+                if room_data is None:
                     continue
+                unchanged.add(u)
+                dedup_key = make_dedup_key(room_data)
+                if dedup and is_duplicate(dedup_key, region, seen_keys, dedup_index):
+                    crawl_state.mark_done(region, [u])
+                    continue
+                room_data["scraped_at"] = datetime.now().isoformat()
                 seen_keys.add(dedup_key)
+                if dedup_index is not None:
+                    dedup_index.add(region, dedup_key, u)
                 region_results.append(room_data)
-                # ❌ REMOVE: results.append(room_data)  # Tidak perlu lagi
-                print(f"    - Scraped data for kos: {room_data['nama_kos']}")
-                if len(region_results) % backup_interval == 0:
-                    backup_round += 1
-                    backup_region(
-                        region_results, region, backup_round, PATHS["backup_folder"]
-                    )
-            except Exception as e:
-                print(f"    X [Error scraping card: {e}]")
-                failed_cards.append((idx, card))
-                failed_cards_info.append({"idx": idx, "error": str(e)})
-                continue
+                journal.append(room_data)
+            if unchanged:
+                incr("cards_unchanged", len(unchanged))
+                print(f"  > Unchanged: {len(unchanged)} cards, refreshed from previous data")
+                card_iter = [u for u in card_iter if u not in unchanged]
 
-        # --- RETRY CARD GAGAL ---
-        for retry in range(1, max_card_retry):
-            if not failed_cards:
-                break
-            print(f"Retrying {len(failed_cards)} failed cards, attempt {retry + 1}")
-            failed_cards_info_retry, backup_round = retry_failed_cards(
-                failed_cards,
-                page,
+        # --- LOOP UTAMA: SCRAPE CARD ---
+        # Record sebelum titik ini = recovered / refresh fingerprint, bukan hasil scrape
+        carried_over = len(region_results)
+        detail_tabs = browser.open_detail_tabs(concurrency)
+        with closing(
+            scrape_cards_concurrent(
+                enumerate(card_iter),
+                detail_tabs,
                 scroll_pause,
                 SELECTORS,
                 parse_utils,
-                dedup,
-                seen_keys,
-                region_results,
-                region,  
-                backup_interval,
-                backup_round,
-                PATHS["backup_folder"],
-                duplicate_exit_threshold,
+                SCRAPER_CONFIG,
+                before_batch=browser.before_batch,
             )
-            failed_cards_info.extend(failed_cards_info_retry)
-            failed_cards = [
-                fc
-                for fc in failed_cards
-                if fc[0] in [info["idx"] for info in failed_cards_info_retry]
-            ]
+        ) as card_results:
+            for idx, url, room_data, error in card_results:
+                if error is not None:
+                    entry = retry_queue.fail(url, error, idx)
+                    print(f"    X [Error scraping card ({entry['error_class']}): {error}]")
+                    crawl_state.mark_failed(region, url, error)
+                    continue
+                try:
+                    dedup_key = make_dedup_key(room_data)
+                    if not all(dedup_key):
+                        print(f"    X [Warning: Data kosong pada field dedup: {dedup_key}]")
+                    if dedup and is_duplicate(dedup_key, region, seen_keys, dedup_index):
+                        print(
+                            f"    X [DUPLICATE: {room_data.get('nama_kos','')} ({room_data.get('area','')} - {room_data.get('alamat','')})]"
+                        )
+                        crawl_state.mark_done(region, [url])
+                        incr("duplicates")
+                        duplicate_count += 1
+                        if duplicate_count > duplicate_exit_threshold:
+                            print(
+                                "    X [Too much duplicate, stopping region scrape!]"
+                            )
+                            break
+                        continue
+                    seen_keys.add(dedup_key)
+                    if dedup_index is not None:
+                        dedup_index.add(region, dedup_key, url)
+                    region_results.append(room_data)
+                    journal.append(room_data)
+                    incr("cards_scraped")
+                    # ❌ REMOVE: results.append(room_data)  # Tidak perlu lagi
+                    print(f"    - Scraped data for kos: {room_data['nama_kos']}")
+                except Exception as e:
+                    entry = retry_queue.fail(url, e, idx)
+                    print(f"    X [Error scraping card ({entry['error_class']}): {e}]")
+                    crawl_state.mark_failed(region, url, e)
+                    continue
+
+        # --- RETRY CARD GAGAL (backoff per URL) ---
+        dead_letters = retry_failed_cards(
+            retry_queue,
+            detail_tabs,
+            scroll_pause,
+            SELECTORS,
+            parse_utils,
+            dedup,
+            seen_keys,
+            region_results,
+            journal,
+            duplicate_exit_threshold,
+            SCRAPER_CONFIG,
+            dedup_index,
+            before_batch=browser.before_batch,
+        )
+        if retry_queue.succeeded:
+            crawl_state.mark_done(region, retry_queue.succeeded)
 
         # --- SIMPAN DATA REGION & FAILED CARDS ---
-        save_region(region_results, region, PATHS["regions_folder"])
-        if failed_cards_info:
-            save_failed_cards(failed_cards_info, region, PATHS["failed_cards_folder"])
+        journal.flush()
+        done_urls = crawl_state.done_urls(region)
+        crawl_state.save_fingerprints(
+            region, {u: fp for u, fp in card_fps.items() if u in done_urls}
+        )
+        crawl_state.set_region_status(region, "completed", len(region_results))
+        if dedup_index is not None:
+            # Listing yang tidak ada lagi di hasil akhir region ini dilepas kepemilikannya
+            dedup_index.release_region(
+                region,
+                keep_urls=[r.get("url") for r in region_results],
+                keep_keys=[make_dedup_key(r) for r in region_results],
+            )
+        # Manifest scheduler: waktu scrape, cards/jam & failure rate region ini
+        # (yield hanya dari card yang benar-benar di-scrape run ini)
+        crawl_state.record_region_run(
+            region,
+            len(region_results) - carried_over,
+            len(dead_letters),
+            time.perf_counter() - region_started,
+        )
+        journal.finalize(PATHS["regions_folder"])
+        # Dead letter lama ikut diganti: region ini baru saja di-crawl ulang
+        save_dead_letters(dead_letters, region, PATHS["failed_cards_folder"])
+        observe("region_total", time.perf_counter() - region_started)
+        region_stats.append(
+            {
+                "region": region,
+                "status": "done",
+                "records": len(region_results),
+                "failed": len(dead_letters),
+                "pagination": pagination,
+            }
+        )
 
-        page.close()
+        browser.close_detail_tabs()
 
     browser.close()
+    playwright.stop()
+    stop_connectivity_monitor()
+    if browser.recycles:
+        print(f"  * [Browser recycled {browser.recycles}x]")
+    if rate.enabled:
+        snapshot = rate.snapshot()
+        print(
+            f"  * [Rate: {snapshot['rate_rps']} req/s | Backoffs: {snapshot['backoffs']}"
+            f" | Waited: {snapshot['waited_seconds']}s]"
+        )
+    if monitor.breaker.trips:
+        print(
+            f"  * [Koneksi putus {monitor.breaker.trips}x | Pause total: {monitor.paused_seconds:.1f}s]"
+        )
+    crawl_state.close()
+    if dedup_index is not None:
+        dedup_index.close()
+    print(f"  * [{format_block_stats()}]")
+    set_region(None)
+    print(f"  * [Slowest phases: {format_phase_summary()}]")
+    write_metrics(
+        PATHS["metrics_report"],
+        PATHS["metrics_prom"],
+        extra={
+            "region_stats": region_stats,
+            "block_stats": BLOCK_STATS,
+            "rate": rate.snapshot(),
+            "connectivity": monitor.snapshot(),
+        },
+    )
     # ❌ REMOVE: return results  # Tidak perlu lagi return accumulated data
+    return region_stats
+
+
+def retry_failed_regions(region_list=None, concurrency=None, dedup=True):
+    """
+    Replay dead letter (data/failed/<region>_failed.json) tanpa crawl ulang list page:
+    card di-scrape langsung per URL (concurrent, dengan backoff), hasilnya digabung
+    ke region file lewat journal, card yang masih gagal ditulis balik ke dead letter.
+    """
+    regions_to_retry = [
+        region
+        for region in dead_letter_regions(PATHS["failed_cards_folder"])
+        if region_list is None or region in region_list
+    ]
+    if not regions_to_retry:
+        print("  * [Tidak ada dead letter untuk di-retry]")
+        return []
+
+    from patchright.sync_api import sync_playwright
+
+    playwright = sync_playwright().start()
+    browser = BrowserManager(playwright, BROWSER_CONFIG).start()
+    configure_rate_controller(SCRAPER_CONFIG.get("rate_control"))
+    start_connectivity_monitor(SCRAPER_CONFIG.get("connectivity"), SCRAPER_CONFIG["base_url"])
+    crawl_state = CrawlState(PATHS["crawl_state_db"])
+    dedup_index = open_dedup_index() if dedup else None
+    concurrency = concurrency or SCRAPER_CONFIG.get("detail_concurrency", 1)
+    scroll_pause = SCRAPER_CONFIG.get("scroll_pause", [1 / 3, 2 / 3, 1, 0])
+    region_stats = []
+
+    for region in regions_to_retry:
+        print("+===+ \n \n+===+")
+        set_region(region)
+        if os.path.exists(f"{PATHS['backup_folder']}/{region}.jsonl"):
+            # Journal masih ada = scrape region belum selesai; jangan ditimpa
+            print(f"  X [Skip Retry: {region} | Run scrape region ini belum selesai]")
+            region_stats.append({"region": region, "status": "skipped"})
+            continue
+        entries = load_dead_letters(PATHS["failed_cards_folder"], region)
+        region_path = f"{PATHS['regions_folder']}/{region}.json"
+        try:
+            with open(region_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except FileNotFoundError:
+            records = []
+        except Exception as e:
+            print(f"  X [Error reading {region_path}: {e}]")
+            region_stats.append({"region": region, "status": "error", "error": str(e)})
+            continue
+        print(f"# Retry failed cards: {region} | {len(entries)} cards")
+
+        region_results = [record for record in records if isinstance(record, dict)]
+        seen_keys = {make_dedup_key(record) for record in region_results}
+        journal = RegionJournal(
+            region,
+            PATHS["backup_folder"],
+            flush_every=SCRAPER_CONFIG["backup_interval"],
+            fsync_every=SCRAPER_CONFIG.get("journal_fsync_every", 1),
+        )
+        journal.seed(region_results)
+        retry_queue = RetryQueue.from_config(
+            region,
+            SCRAPER_CONFIG.get("retry_queue"),
+            max_attempts=SCRAPER_CONFIG.get("max_card_retry", 2),
+        )
+        retry_queue.requeue(entries)
+
+        detail_tabs = browser.open_detail_tabs(concurrency)
+        dead_letters = retry_failed_cards(
+            retry_queue,
+            detail_tabs,
+            scroll_pause,
+            SELECTORS,
+            parse_utils,
+            dedup,
+            seen_keys,
+            region_results,
+            journal,
+            SCRAPER_CONFIG.get("duplicate_exit_threshold", 20),
+            SCRAPER_CONFIG,
+            dedup_index,
+            before_batch=browser.before_batch,
+        )
+        if retry_queue.succeeded:
+            crawl_state.mark_done(region, retry_queue.succeeded)
+        journal.finalize(PATHS["regions_folder"])
+        save_dead_letters(dead_letters, region, PATHS["failed_cards_folder"])
+        browser.close_detail_tabs()
+        recovered = len(entries) - len(dead_letters)
+        print(f"  * [Retry {region}: {recovered} recovered | {len(dead_letters)} still failed]")
+        region_stats.append(
+            {"region": region, "status": "done", "recovered": recovered, "failed": len(dead_letters)}
+        )
+
+    browser.close()
+    playwright.stop()
+    stop_connectivity_monitor()
+    crawl_state.close()
+    if dedup_index is not None:
+        dedup_index.close()
+    set_region(None)
+    return region_stats
 
 
 if __name__ == "__main__":
-    args = parse_args()
+    if args.command == "retry-failed":
+        BROWSER_CONFIG["headless"] = not args.head
+        retry_stats = retry_failed_regions(
+            [r.strip() for r in args.region.split(",") if r.strip()] if args.region else None,
+            concurrency=args.concurrency,
+            dedup=not args.no_dedup,
+        )
+        if any(stat["status"] == "done" for stat in retry_stats):
+            generate_master_file(PATHS["regions_folder"], PATHS["data_dir"], PATHS["master_file"])
+        write_metrics(PATHS["metrics_report"], PATHS["metrics_prom"], extra={"retry_stats": retry_stats})
+        sys.exit(0)
+
     # Pilih region
     if args.region:
         region_list = [r.strip() for r in args.region.split(",") if r.strip()]
@@ -258,26 +630,59 @@ if __name__ == "__main__":
     # Start from region ke-N
     region_list = region_list[args.start_from :]
 
+    # Urutkan region dari manifest (stalest & yield tertinggi dulu); region lengkap di-skip
+    if not args.fixed_order:
+        region_list, _ = plan_regions(region_list, force=args.force)
+
     # Set headless mode
     BROWSER_CONFIG["headless"] = not args.head
 
-    # ✅ UPDATED: Call scraper (no return value needed)
-    scrape_mamikos_single(
-        region_list,
+    scrape_kwargs = dict(
         force=args.force,
         limit_card=args.limit_card,
         limit_loadmore=args.limit_loadmore,
         backup_interval=args.backup_interval,
         dedup=not args.no_dedup,
+        concurrency=args.concurrency,
+        listing_capture=True if args.capture else None,
     )
 
+    worker_results = []
+    if not region_list:
+        print("  * [Semua region sudah lengkap, tidak ada yang di-scrape]")
+    elif args.workers and args.workers > 1:
+        # Worker pull region dari antrian bersama, masing-masing dengan profil browser sendiri
+        worker_results = run_workers(region_list, args.workers, scrape_kwargs)
+    else:
+        # ✅ UPDATED: Call scraper (no return value needed)
+        scrape_mamikos_single(region_list, **scrape_kwargs)
+
     print("+===+ \n \n+===+ \n# Scrape Done ;)")
 
     # ✅ NEW: Generate master file dari semua region files
-    total_records = generate_master_file(
-        PATHS["regions_folder"], 
-        PATHS["data_dir"], 
-        PATHS["master_file"]
+    with span("master_generate"):
+        total_records = generate_master_file(
+            PATHS["regions_folder"], 
+            PATHS["data_dir"], 
+            PATHS["master_file"]
+        )
+    if args.export_parquet:
+        with span("parquet_export"):
+            try:
+                from tools.export_utils import export_parquet
+
+                export_parquet(PATHS["regions_folder"], PATHS["parquet_file"])
+            except ImportError as e:
+                print(f"  X [{e}]")
+
+    # Tulis ulang report supaya fase master ikut tercatat (mode --workers: report tiap worker terpisah)
+    write_metrics(
+        PATHS["metrics_report"],
+        PATHS["metrics_prom"],
+        extra={"workers": worker_results} if worker_results else None,
     )
 
     print("\n+===+ \n \n+===+")
+
+    if any(result["exitcode"] != 0 for result in worker_results):
+        sys.exit(1)
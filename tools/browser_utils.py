@@ -0,0 +1,241 @@
+"""Browser helpers: blokir resource yang tidak dibutuhkan scraper & lifecycle browser"""
+
+import os
+from urllib.parse import urlparse
+
+from tools.metrics_utils import incr, set_gauge
+
+# Counter global per proses, dibaca di akhir run
+BLOCK_STATS = {
+    "blocked": 0,
+    "allowed": 0,
+    "bytes_saved_estimate": 0,
+    "blocked_by_type": {},
+    "blocked_by_domain": {},
+}
+
+
+def _host_matches(host, domains):
+    """True jika host sama dengan / subdomain dari salah satu domain."""
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def should_block(resource_type, url, rules):
+    """
+    Tentukan apakah request perlu diblokir.
+    Urutan: allow_types -> allow_domains -> deny_types -> deny_domains -> allow.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    if resource_type in rules.get("allow_types", ()):
+        return False
+    if _host_matches(host, rules.get("allow_domains", ())):
+        return False
+    if resource_type in rules.get("deny_types", ()):
+        return True
+    if _host_matches(host, rules.get("deny_domains", ())):
+        return True
+    return False
+
+
+def install_resource_blocking(context, rules, stats=BLOCK_STATS):
+    """
+    Pasang route handler di browser context sesuai BROWSER_CONFIG["block_resources"].
+    Request yang diblokir di-abort dan dihitung di `stats`.
+    """
+    if not rules or not rules.get("enabled"):
+        return False
+    estimated_bytes = rules.get("estimated_bytes", {})
+
+    def handle_route(route):
+        request = route.request
+        resource_type = request.resource_type
+        if should_block(resource_type, request.url, rules):
+            host = urlparse(request.url).hostname or ""
+            stats["blocked"] += 1
+            stats["bytes_saved_estimate"] += estimated_bytes.get(resource_type, 0)
+            by_type = stats["blocked_by_type"]
+            by_type[resource_type] = by_type.get(resource_type, 0) + 1
+            by_domain = stats["blocked_by_domain"]
+            by_domain[host] = by_domain.get(host, 0) + 1
+            route.abort()
+        else:
+            stats["allowed"] += 1
+            route.continue_()
+
+    context.route("**/*", handle_route)
+    print(
+        f"  * [Resource blocking on | Types: {', '.join(rules.get('deny_types', []))}"
+        f" | Domains: {len(rules.get('deny_domains', []))}]"
+    )
+    return True
+
+
+def format_block_stats(stats=BLOCK_STATS):
+    """Ringkasan satu baris untuk log akhir run."""
+    total = stats["blocked"] + stats["allowed"]
+    mb_saved = stats["bytes_saved_estimate"] / (1024 * 1024)
+    by_type = ", ".join(
+        f"{k}={v}" for k, v in sorted(stats["blocked_by_type"].items())
+    )
+    return (
+        f"Blocked requests: {stats['blocked']}/{total} | ~{mb_saved:.1f} MB saved"
+        + (f" | {by_type}" if by_type else "")
+    )
+
+
+def process_tree(root_pid):
+    """PID root + semua turunannya (baca /proc, Linux)."""
+    children = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return [root_pid]
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def rss_kb(pid):
+    """VmRSS proses (KB), 0 jika tidak terbaca."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def browser_rss_mb():
+    """Total RSS semua child proses ini (driver Playwright + Chromium) dalam MB."""
+    pid = os.getpid()
+    return sum(rss_kb(child) for child in process_tree(pid) if child != pid) / 1024
+
+
+def open_detail_tabs(context, count):
+    """Buka `count` tab detail long-lived yang dipakai ulang untuk semua card region."""
+    return [context.new_page() for _ in range(max(1, count or 1))]
+
+
+def close_detail_tabs(detail_tabs):
+    """Tutup semua tab detail, abaikan tab yang sudah mati."""
+    for tab in detail_tabs:
+        try:
+            tab.close()
+        except Exception:
+            pass
+
+
+class BrowserManager:
+    """
+    Pegang persistent context + pool tab detail long-lived. Browser di-restart
+    setelah `max_pages` navigasi atau saat RSS driver + Chromium melewati
+    `max_rss_mb`. Restart hanya terjadi di titik aman (awal region / saat pool
+    tab detail idle), tab detail diganti di list yang sama, jadi progres region tidak hilang.
+    """
+
+    def __init__(self, playwright, browser_config):
+        self.playwright = playwright
+        self.config = browser_config
+        lifecycle = browser_config.get("lifecycle", {})
+        self.max_pages = lifecycle.get("max_pages", 0)
+        self.max_rss_mb = lifecycle.get("max_rss_mb", 0)
+        self.rss_check_every = max(1, lifecycle.get("rss_check_every", 20))
+        self.context = None
+        self.detail_tabs = []
+        self.pages = 0
+        self.recycles = 0
+        self._next_rss_check = self.rss_check_every
+        self._recycle_reason = None
+
+    def start(self):
+        self.context = self.playwright.chromium.launch_persistent_context(
+            user_data_dir=self.config["user_data_dir"],
+            channel=self.config["channel"],
+            headless=self.config["headless"],
+            no_viewport=self.config["no_viewport"],
+        )
+        install_resource_blocking(self.context, self.config.get("block_resources"))
+        self.pages = 0
+        self._next_rss_check = self.rss_check_every
+        return self
+
+    def new_page(self):
+        return self.context.new_page()
+
+    def open_detail_tabs(self, count):
+        self.detail_tabs[:] = open_detail_tabs(self.context, count)
+        return self.detail_tabs
+
+    def close_detail_tabs(self):
+        close_detail_tabs(self.detail_tabs)
+        self.detail_tabs.clear()
+
+    def note_pages(self, count=1):
+        self.pages += count
+
+    def should_recycle(self):
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"{self.pages} pages"
+        if self.max_rss_mb and self.pages >= self._next_rss_check:
+            self._next_rss_check = self.pages + self.rss_check_every
+            rss_mb = browser_rss_mb()
+            set_gauge("browser_rss_mb", round(rss_mb, 1))
+            if rss_mb > self.max_rss_mb:
+                return f"RSS {rss_mb:.0f} MB"
+        return None
+
+    def recycle(self, reason):
+        """Tutup context lalu launch ulang; jumlah tab detail dipertahankan."""
+        tab_count = len(self.detail_tabs)
+        print(f"    * [Recycling browser: {reason} | Restart #{self.recycles + 1}]")
+        self.close()
+        self.start()
+        if tab_count:
+            self.open_detail_tabs(tab_count)
+        self.recycles += 1
+        self._recycle_reason = None
+        incr("browser_recycles")
+
+    def maybe_recycle(self):
+        reason = self.should_recycle()
+        if reason:
+            self.recycle(reason)
+        return reason is not None
+
+    def before_batch(self, count, idle=True):
+        """
+        Hook scrape_cards_concurrent sebelum navigasi `count` card. Restart hanya
+        saat pool idle (tidak ada tab yang sedang load); restart yang jatuh tempo
+        saat pool sibuk diingat dan return False supaya pool berhenti mengisi tab.
+        """
+        if self._recycle_reason is None:
+            self._recycle_reason = self.should_recycle()
+        if self._recycle_reason is not None:
+            if not idle:
+                return False
+            self.recycle(self._recycle_reason)
+        self.note_pages(count)
+        return True
+
+    def close(self):
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception:
+                pass
+            self.context = None
+        self.detail_tabs.clear()
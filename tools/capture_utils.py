@@ -0,0 +1,126 @@
+"""Capture response JSON listing (XHR) sebagai pengganti baca card dari DOM"""
+
+import os
+import glob
+import json
+import time
+from urllib.parse import urljoin
+
+
+def _first_value(room, keys):
+    """Ambil value pertama yang tidak kosong dari daftar key (boleh dotted: "a.b")."""
+    for key in keys:
+        value = room
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def find_room_list(payload, list_keys):
+    """Cari list room di payload: coba key yang dikenal, termasuk satu level nested."""
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return []
+    for key in list_keys:
+        value = payload.get(key)
+        if isinstance(value, list):
+            return value
+    for value in payload.values():
+        if isinstance(value, dict):
+            rooms = find_room_list(value, list_keys)
+            if rooms:
+                return rooms
+    return []
+
+
+def parse_listing_payload(payload, capture_config, base_url):
+    """
+    Ubah satu payload JSON listing jadi ringkasan card dengan skema yang sama
+    seperti get_room_card_summaries: {url, name, price, rating, text}.
+    Room tanpa URL detail di-skip.
+    """
+    fields = capture_config["fields"]
+    summaries = []
+    for room in find_room_list(payload, capture_config["list_keys"]):
+        if not isinstance(room, dict):
+            continue
+        url = _first_value(room, fields["url"])
+        if not url:
+            continue
+        summary = {
+            "url": urljoin(base_url, url),
+            "name": _first_value(room, fields["name"]),
+            "price": _first_value(room, fields["price"]),
+            "rating": _first_value(room, fields["rating"]),
+        }
+        summary["text"] = " ".join(v for v in (summary["name"], summary["price"], summary["rating"]) if v)
+        summaries.append(summary)
+    return summaries
+
+
+class ListingCapture:
+    """
+    Dengarkan page.on("response") dan kumpulkan ringkasan card dari payload
+    JSON listing. Kalau tidak ada payload yang tertangkap, caller fallback ke DOM.
+    Payload mentah bisa direkam (record_folder) untuk diputar ulang di stub server.
+    """
+
+    def __init__(self, page, capture_config, base_url, record_folder=None):
+        self.page = page
+        self.config = capture_config
+        self.base_url = base_url
+        self.record_folder = record_folder
+        self.summaries = []
+        self.payloads = 0
+        self.errors = 0
+        self._seen_urls = set()
+        if record_folder:
+            os.makedirs(record_folder, exist_ok=True)
+            # Rekaman lama region ini diganti, supaya halaman dari run berbeda tidak tercampur
+            for path in glob.glob(f"{record_folder}/payload_*.json"):
+                os.remove(path)
+        page.on("response", self._on_response)
+
+    def _matches(self, url):
+        return any(pattern in url for pattern in self.config["url_patterns"])
+
+    def _on_response(self, response):
+        if not self._matches(response.url):
+            return
+        try:
+            payload = response.json()
+        except Exception:
+            self.errors += 1
+            return
+        self.payloads += 1
+        if self.record_folder:
+            path = f"{self.record_folder}/payload_{self.payloads:03d}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+        for summary in parse_listing_payload(payload, self.config, self.base_url):
+            if summary["url"] in self._seen_urls:
+                continue
+            self._seen_urls.add(summary["url"])
+            self.summaries.append(summary)
+
+    def wait_for_count(self, previous_count, timeout=10000):
+        """
+        Tunggu sampai jumlah card hasil capture > previous_count.
+        Pakai page.wait_for_timeout supaya event response tetap diproses.
+
+        Returns:
+            int: Jumlah card terbaru (sama dengan previous_count jika timeout)
+        """
+        deadline = time.monotonic() + timeout / 1000
+        while len(self.summaries) <= previous_count and time.monotonic() < deadline:
+            self.page.wait_for_timeout(100)
+        return len(self.summaries)
+
+    def detach(self):
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
@@ -1,9 +1,12 @@
+import sys
 import argparse
-from tools.config import SCRAPER_CONFIG
+from tools.config import SCRAPER_CONFIG, PATHS
 
+# Subcommand; tanpa subcommand (cara lama: python scraper.py --region ...) = scrape
+COMMANDS = ["scrape", "retry-failed", "merge", "stats", "validate", "export", "query"]
 
-def parse_args():
-    parser = argparse.ArgumentParser()
+
+def add_scrape_arguments(parser):
     parser.add_argument(
         "--region",
         type=str,
@@ -31,7 +34,34 @@ def parse_args():
         "--backup-interval",
         type=int,
         default=SCRAPER_CONFIG["backup_interval"],
-        help="Interval backup otomatis per berapa card.",
+        help="Flush journal backup (JSONL) per berapa card.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Jumlah tab detail yang diproses bersamaan per region (default dari config).",
+    )
+    parser.add_argument(
+        "--capture",
+        action="store_true",
+        help="Ambil card dari response JSON listing (XHR) alih-alih DOM; fallback ke DOM jika tidak ada payload.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Jumlah proses paralel; worker ambil region dari antrian bersama, tiap worker punya profil browser sendiri.",
+    )
+    parser.add_argument(
+        "--fixed-order",
+        action="store_true",
+        help="Scrape sesuai urutan input (tanpa scheduler staleness/yield).",
+    )
+    parser.add_argument(
+        "--export-parquet",
+        action="store_true",
+        help="Setelah master file dibuat, export dataset ke Parquet (butuh pyarrow).",
     )
     parser.add_argument(
         "--head",
@@ -55,4 +85,59 @@ def parse_args():
         default=None,
         help="Range region dari list regions.py, format: start:end (contoh: --start-end 3:5 untuk region ke-3 sampai ke-4, seperti slicing Python).",
     )
-    return parser.parse_args()
+
+
+def parse_args(argv=None):
+    """
+    Parse CLI dengan subcommand. Selain `scrape` & `retry-failed`, semua command
+    offline: tidak import patchright dan tidak membuka browser.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["scrape"] + argv
+
+    parser = argparse.ArgumentParser(description="Mamikos kos scraper")
+    subparsers = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+    add_scrape_arguments(subparsers.add_parser("scrape", help="Scrape region (default)"))
+
+    retry_parser = subparsers.add_parser(
+        "retry-failed", help="Scrape ulang card di dead letter (data/failed) tanpa crawl region"
+    )
+    retry_parser.add_argument("--region", type=str, default=None, help="Filter region (koma).")
+    retry_parser.add_argument(
+        "--concurrency", type=int, default=None, help="Jumlah tab detail bersamaan."
+    )
+    retry_parser.add_argument("--head", action="store_true", help="Jalankan browser non-headless.")
+    retry_parser.add_argument("--no-dedup", action="store_true", help="Matikan deduplication.")
+
+    merge_parser = subparsers.add_parser("merge", help="Generate ulang master file dari region files")
+    merge_parser.add_argument(
+        "--full", action="store_true", help="Abaikan manifest, baca ulang semua region file."
+    )
+
+    stats_parser = subparsers.add_parser("stats", help="Ringkasan jumlah data per region")
+    stats_parser.add_argument("--region", type=str, default=None, help="Filter region (koma).")
+    stats_parser.add_argument("--json", action="store_true", help="Output JSON")
+
+    validate_parser = subparsers.add_parser("validate", help="Cek format & isi region files")
+    validate_parser.add_argument("--region", type=str, default=None, help="Filter region (koma).")
+    validate_parser.add_argument(
+        "--strict", action="store_true", help="Warning (field kosong, duplikat) juga dianggap gagal."
+    )
+
+    export_parser = subparsers.add_parser("export", help="Export dataset (Parquet / normalized JSON)")
+    export_parser.add_argument("--format", choices=["parquet", "normalized"], default="parquet")
+    export_parser.add_argument(
+        "--per-region", action="store_true", help="Parquet: tulis juga satu file per region."
+    )
+
+    # Import di sini: query_utils cuma butuh sqlite3 (stdlib)
+    from tools.query_utils import add_query_arguments
+
+    query_parser = subparsers.add_parser("query", help="Cari listing di SQLite query engine")
+    query_parser.add_argument("--db", default=PATHS["query_db"])
+    query_parser.add_argument(
+        "--ingest", action="store_true", help="Ingest region file yang berubah sebelum query."
+    )
+    add_query_arguments(query_parser)
+    return parser.parse_args(argv)
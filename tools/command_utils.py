@@ -0,0 +1,195 @@
+"""
+Command offline (merge, stats, validate, export, query) untuk CLI scraper.
+Tidak ada yang import patchright / membuka browser; modul berat di-import
+di dalam command yang membutuhkannya.
+"""
+
+import os
+import json
+import glob
+
+from tools.config import PATHS
+
+# Field yang wajib terisi di tiap record hasil scrape
+REQUIRED_FIELDS = ["nama_kos", "harga", "url"]
+
+
+def _region_files(region_filter=None):
+    """[(region, path)] urut nama, opsional difilter daftar region dipisah koma."""
+    wanted = {r.strip() for r in region_filter.split(",") if r.strip()} if region_filter else None
+    files = []
+    for path in sorted(glob.glob(f"{PATHS['regions_folder']}/*.json")):
+        region = os.path.basename(path)[: -len(".json")]
+        if wanted is None or region in wanted:
+            files.append((region, path))
+    return files
+
+
+def _load_region(path):
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError("Invalid format (expected list)")
+    return records
+
+
+def run_merge(args):
+    from tools.master_utils import generate_master_file
+
+    generate_master_file(
+        PATHS["regions_folder"], PATHS["data_dir"], PATHS["master_file"], full_rebuild=args.full
+    )
+    return 0
+
+
+def region_stats(region, path):
+    """Ringkasan satu region file: jumlah record, URL unik, area, jenis kos, scrape terakhir."""
+    records = _load_region(path)
+    records = [record for record in records if isinstance(record, dict)]
+    jenis = {}
+    for record in records:
+        key = record.get("jenis_kos") or "-"
+        jenis[key] = jenis.get(key, 0) + 1
+    scraped = [record.get("scraped_at") for record in records if record.get("scraped_at")]
+    return {
+        "region": region,
+        "records": len(records),
+        "unique_urls": len({record.get("url") for record in records if record.get("url")}),
+        "areas": len({record.get("area") for record in records if record.get("area")}),
+        "jenis_kos": dict(sorted(jenis.items())),
+        "last_scraped_at": max(scraped) if scraped else None,
+        "size_kb": round(os.path.getsize(path) / 1024, 1),
+    }
+
+
+def run_stats(args):
+    rows = []
+    for region, path in _region_files(args.region):
+        try:
+            rows.append(region_stats(region, path))
+        except Exception as e:
+            print(f"    X [Error reading {path}: {e}]")
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    for row in rows:
+        print(
+            f"  > {row['region']}: {row['records']} records | {row['unique_urls']} URL unik"
+            f" | {row['areas']} area | {row['jenis_kos']} | last: {row['last_scraped_at']}"
+        )
+    total = sum(row["records"] for row in rows)
+    print(f"  * [Total: {len(rows)} region, {total} records]")
+    return 0
+
+
+def validate_region(records, seen_urls, region):
+    """
+    Cek isi satu region. seen_urls (url -> region) dipakai lintas region
+    untuk deteksi duplikat.
+
+    Returns:
+        tuple: (errors, warnings) list pesan
+    """
+    errors, warnings = [], []
+    missing = {}
+    duplicates = cross_duplicates = 0
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"record #{i} bukan object")
+            continue
+        for field in REQUIRED_FIELDS:
+            if not record.get(field):
+                missing[field] = missing.get(field, 0) + 1
+        url = record.get("url")
+        if not url:
+            continue
+        owner = seen_urls.get(url)
+        if owner == region:
+            duplicates += 1
+        elif owner is not None:
+            cross_duplicates += 1
+        else:
+            seen_urls[url] = region
+    for field, count in missing.items():
+        warnings.append(f"{count} record tanpa {field}")
+    if duplicates:
+        warnings.append(f"{duplicates} URL duplikat dalam region")
+    if cross_duplicates:
+        warnings.append(f"{cross_duplicates} URL juga ada di region lain")
+    return errors, warnings
+
+
+def run_validate(args):
+    seen_urls = {}
+    total_errors = total_warnings = 0
+    files = _region_files(args.region)
+    for region, path in files:
+        try:
+            records = _load_region(path)
+        except Exception as e:
+            errors, warnings = [f"tidak bisa dibaca: {e}"], []
+        else:
+            errors, warnings = validate_region(records, seen_urls, region)
+        if os.path.exists(f"{PATHS['backup_folder']}/{region}.jsonl"):
+            warnings.append("journal backup masih ada (run terakhir belum selesai)")
+        for message in errors:
+            print(f"    X [{region}: {message}]")
+        for message in warnings:
+            print(f"    ! [{region}: {message}]")
+        total_errors += len(errors)
+        total_warnings += len(warnings)
+    print(
+        f"  * [Validate: {len(files)} region | {total_errors} error | {total_warnings} warning]"
+    )
+    failed = total_errors or (args.strict and total_warnings)
+    return 1 if failed else 0
+
+
+def run_export(args):
+    try:
+        if args.format == "parquet":
+            from tools.export_utils import export_parquet
+
+            export_parquet(
+                PATHS["regions_folder"],
+                PATHS["parquet_file"],
+                PATHS["parquet_regions_folder"] if args.per_region else None,
+            )
+        else:
+            from tools.normalize_utils import normalize_regions
+
+            normalize_regions(PATHS["regions_folder"], PATHS["normalized_folder"])
+    except ImportError as e:
+        print(f"  X [{e}]")
+        return 1
+    return 0
+
+
+def run_query(args):
+    from tools import query_utils
+
+    if args.ingest:
+        store = query_utils.ListingStore(args.db)
+        try:
+            store.ingest_regions(PATHS["regions_folder"])
+        except ImportError as e:
+            print(f"  X [{e}]")
+            return 1
+        finally:
+            store.close()
+    query_utils.run_query(args, args.db)
+    return 0
+
+
+OFFLINE_COMMANDS = {
+    "merge": run_merge,
+    "stats": run_stats,
+    "validate": run_validate,
+    "export": run_export,
+    "query": run_query,
+}
+
+
+def run_offline_command(args):
+    """Jalankan command non-scrape. Return exit code."""
+    return OFFLINE_COMMANDS[args.command](args)
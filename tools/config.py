@@ -12,24 +12,88 @@ SCRAPER_CONFIG = {
     # --- Timeout & Retry ---
     "page_timeout": 15000,  # Timeout saat buka halaman (ms)
     "load_timeout": 10000,  # Timeout tunggu elemen (ms)
-    "max_connection_retry": 3,  # Maksimal percobaan cek koneksi internet sebelum scraper berhenti
-    "internet_check_timeout": 3,  # Timeout cek koneksi internet (detik)
-    "internet_retry_sleep": 10,  # Jeda antar percobaan koneksi (detik)
-    "max_card_retry": 2,  # Jumlah maksimal percobaan ulang (retry) untuk card yang gagal
+    "connectivity": {  # Monitor koneksi di background + circuit breaker (pause/resume, tidak exit)
+        "enabled": True,
+        "host": "8.8.8.8",  # Host:port probe TCP koneksi internet (benchmark: server lokal)
+        "port": 53,
+        "target_url": None,  # URL probe latency site target; None = origin base_url
+        "timeout": 3,  # Timeout tiap probe (detik)
+        "interval": 15,  # Jeda probe saat koneksi sehat (detik)
+        "reset_timeout": 5,  # Jeda probe ulang saat circuit open (detik)
+        "failure_threshold": 2,  # Kegagalan beruntun sebelum circuit open
+        "pause_log_every": 30,  # Log "masih menunggu" tiap N detik selama pause
+    },
+    "max_card_retry": 2,  # Maksimal percobaan per card (termasuk percobaan pertama) sebelum masuk dead letter
+    "retry_queue": {  # Backoff retry card gagal: min(max_delay, base_delay * factor^(n-1)) +-jitter
+        "base_delay": 2.0,
+        "factor": 2.0,
+        "max_delay": 60.0,
+        "jitter": 0.5,
+        "batch_window": 1.0,  # Card yang jatuh tempo dalam N detik di-retry bersama (concurrent)
+    },
 
     # --- Scraping Logic ---
     "max_load_more_clicks": 30,  # Maksimal klik tombol 'load more' per region
+    "load_more_link_timeout": 2000,  # Tunggu link load more muncul lagi setelah klik (ms), hilang = list habis
+    "load_more_plateau_patience": 1,  # Berhenti setelah sekian klik berturut-turut tanpa card baru
     "scroll_pause": [
         1 / 3,
         2 / 3,
         1,
         0,
     ],  # Posisi scroll saat buka detail kos (relatif tinggi halaman)
+    "lazy_sections": [
+        "facilities",
+        "rules",
+        "landmark_names",
+        "address",
+    ],  # Section lazy-load (key SELECTORS) yang ditunggu per selector di halaman detail
+    "section_step_timeout": 2000,  # Maks tunggu section per posisi scroll (ms)
+    "section_deadline": 6000,  # Total maks tunggu semua section per card (ms)
+    "detail_poll_interval": 50,  # Jeda poll tab detail yang sedang load (ms)
+    "listing_capture": {  # Ambil card dari response JSON listing (XHR), fallback ke DOM
+        "enabled": False,
+        "record": False,  # Simpan payload mentah ke PATHS["capture_folder"]/<region> (untuk stub server)
+        "url_patterns": ["/garuda/stories/list"],  # Potongan URL response listing
+        "list_keys": ["rooms", "data", "results"],  # Key list room di payload
+        "fields": {  # Field record -> kandidat key di payload (boleh dotted)
+            "url": ["share_url", "url", "detail_url"],
+            "name": ["room-title", "room_title", "name"],
+            "price": ["price_title_format.price", "price_title", "price"],
+            "rating": ["rating"],
+        },
+    },
+    "rate_control": {  # Pacing semua navigasi & klik: token bucket, rate diatur AIMD (per proses)
+        "enabled": True,
+        "initial_rate": 1.0,  # Request/detik di awal run
+        "min_rate": 0.2,
+        "max_rate": 4.0,
+        "burst": 1,  # Maks token terkumpul (request beruntun tanpa jeda)
+        "increase": 0.05,  # + req/detik tiap halaman sukses & cepat
+        "decrease": 0.5,  # x rate saat timeout / HTTP 429/5xx / latency naik
+        "latency_factor": 2.0,  # Latency > faktor x baseline (EWMA) dianggap melambat...
+        "slow_latency": 2.0,  # ...asal juga > sekian detik
+        "cooldown": 5.0,  # Jeda minimal antar penurunan rate (detik)
+        "jitter": 0.2,  # Tambahan acak maks 20% dari tiap tunggu
+    },
     "completed_region_threshold": 150,  # Jika data region > ini, region dianggap sudah lengkap (skip)
+    "scheduler": {  # Urutan region dari manifest crawl state: staleness x expected yield (cards/jam x sukses)
+        "enabled": True,
+        "stale_after_hours": 168,  # Umur scrape terakhir yang dianggap basi penuh (skor staleness 1)
+        "refresh_after_hours": None,  # Region lengkap di-scrape ulang setelah N jam (None = tetap skip)
+    },
     "duplicate_exit_threshold": 20,  # Maksimal duplikat sebelum region dihentikan
+    "fingerprint_skip": True,  # Listing yang fingerprint list page-nya tidak berubah tidak di-scrape ulang
+    "dedup_bloom": {  # Tier Bloom filter di depan dedup index (untuk histori sangat besar)
+        "enabled": False,
+        "capacity": 1_000_000,
+        "error_rate": 0.001,
+    },
+    "detail_concurrency": 1,  # Jumlah tab detail yang dibuka bersamaan per region
 
     # --- Backup & Data ---
-    "backup_interval": 50,  # Backup otomatis setiap N card
+    "backup_interval": 50,  # Flush journal backup (JSONL append) setiap N card
+    "journal_fsync_every": 1,  # fsync journal setiap N flush (0 = tanpa fsync)
 }
 
 # Browser settings
@@ -38,6 +102,44 @@ BROWSER_CONFIG = {
     "channel": "chrome",  # Channel browser (chrome, msedge, dll)
     "headless": True,  # True = tanpa tampilan GUI
     "no_viewport": True,  # True = viewport default browser
+    # Restart browser berkala supaya memori tetap datar di run panjang (0 = nonaktif)
+    "lifecycle": {
+        "max_pages": 1000,  # Restart setelah sekian navigasi (list + detail)
+        "max_rss_mb": 2048,  # Restart jika RSS driver + Chromium melewati ini (MB, Linux)
+        "rss_check_every": 25,  # Cek RSS tiap sekian navigasi
+    },
+    # Blokir resource berat / tracker lewat context.route (selector tetap aman)
+    "block_resources": {
+        "enabled": True,
+        "allow_types": ["document"],  # Tidak pernah diblokir
+        "allow_domains": [],  # Domain yang tidak pernah diblokir
+        "deny_types": ["image", "font", "media"],  # Tipe resource yang diblokir
+        "deny_domains": [  # Analytics, ads & chat widget
+            "google-analytics.com",
+            "googletagmanager.com",
+            "doubleclick.net",
+            "googleadservices.com",
+            "googlesyndication.com",
+            "facebook.net",
+            "facebook.com",
+            "hotjar.com",
+            "clarity.ms",
+            "moengage.com",
+            "branch.io",
+            "analytics.tiktok.com",
+            "criteo.com",
+            "qiscus.com",
+        ],
+        # Perkiraan ukuran rata-rata per tipe (byte) untuk hitung bandwidth yang dihemat
+        "estimated_bytes": {
+            "image": 80_000,
+            "font": 40_000,
+            "media": 500_000,
+            "script": 60_000,
+            "xhr": 5_000,
+            "fetch": 5_000,
+        },
+    },
 }
 
 # File paths
@@ -47,6 +149,17 @@ PATHS = {
     "regions_folder": "data/regions",  # Folder data per region
     "master_file": "data-scraper.json",  # Nama file data utama
     "failed_cards_folder": "data/failed",  # Folder untuk simpan card gagal setelah retry
+    "crawl_state_db": "data/crawl_state.db",  # SQLite status crawl per listing (resume)
+    "dedup_index_db": "data/dedup_index.db",  # Dedup index persisten lintas region & run
+    "dedup_bloom": "data/dedup_index.bloom",  # File Bloom filter dedup (jika diaktifkan)
+    "capture_folder": "data/capture",  # Rekaman payload JSON listing (mode capture)
+    "workers_folder": "data/workers",  # Folder log & ringkasan hasil per worker (--workers)
+    "parquet_file": "data/parquet/data-scraper.parquet",  # Export kolumnar master dataset
+    "parquet_regions_folder": "data/parquet/regions",  # Export Parquet per region (opsional)
+    "normalized_folder": "data/normalized",  # Dataset dengan field bertipe (harga_idr, rating_num, dst)
+    "query_db": "data/listings.db",  # SQLite query engine (python -m tools.query_utils ingest)
+    "metrics_report": "data/metrics/run_report.json",  # Run report JSON (durasi per fase & region)
+    "metrics_prom": "data/metrics/scraper.prom",  # Export Prometheus text format (textfile collector)
 }
 
 # CSS Selectors
@@ -55,6 +168,11 @@ SELECTORS = {
     # Multiple room card selectors for fallback
     "room_card_primary": 'div[data-testid="roomCard"]',      # Selector utama
     "room_card_fallback": 'div[data-testid="kostRoomCard"]', # Selector fallback
+    "room_card_link": "a[href]",  # Link ke halaman detail di dalam/sekitar room card
+    # Field murah di markup room card (list page) untuk fingerprint; kosong -> pakai text card
+    "card_name": ".rc-info__name",
+    "card_price": ".rc-price__text",
+    "card_rating": ".rc-overview__rating",
     "room_name": ".detail-title__room-name",
     "gender": ".detail-kost-overview__gender-box",
     "area": ".detail-kost-overview__area-text",
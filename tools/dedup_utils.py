@@ -0,0 +1,202 @@
+"""Dedup index persisten lintas region & run (SQLite + Bloom filter opsional)"""
+
+import os
+import math
+import struct
+import sqlite3
+import hashlib
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_urls (
+    url TEXT PRIMARY KEY,
+    region TEXT NOT NULL,
+    first_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    key_hash TEXT PRIMARY KEY,
+    region TEXT NOT NULL,
+    url TEXT,
+    first_seen TEXT NOT NULL
+);
+"""
+
+
+def hash_dedup_key(dedup_key):
+    """Hash tuple dedup (nama_kos, area, alamat) yang sudah di-normalize."""
+    return hashlib.sha1("\x1f".join(dedup_key).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """Bloom filter sederhana di atas bytearray (double hashing blake2b)."""
+
+    HEADER = struct.Struct("<QIQ")  # bit count, hash count, jumlah item
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.size, self.hash_count, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            size, hash_count, count = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            bits = bytearray(f.read())
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hash_count, bloom.count, bloom.bits = size, hash_count, count, bits
+        return bloom
+
+
+class DedupIndex:
+    """
+    Index listing yang pernah di-scrape, per URL dan per tuple dedup, beserta
+    region pemiliknya. Listing yang sudah "dimiliki" region lain di-skip
+    sebelum halaman detailnya dibuka.
+
+    Bloom filter (opsional) dipakai sebagai tier pertama: jawaban "tidak ada"
+    langsung dipercaya, jawaban "mungkin ada" dikonfirmasi ke SQLite. Bloom
+    hanya tahu isi index saat dibuka + tambahan proses ini sendiri, jadi untuk
+    dedup antar worker yang jalan bersamaan, matikan bloom.
+    Tuple dedup yang ada field kosongnya tidak ikut diindeks (terlalu mudah bentrok).
+    """
+
+    def __init__(self, db_path, bloom_path=None, bloom_capacity=1_000_000, bloom_error_rate=0.001):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self.bloom_path = bloom_path
+        self.bloom = None
+        if bloom_path:
+            self.bloom = self._open_bloom(bloom_capacity, bloom_error_rate)
+
+    def _row_count(self):
+        urls = self.conn.execute("SELECT COUNT(*) FROM dedup_urls").fetchone()[0]
+        keys = self.conn.execute("SELECT COUNT(*) FROM dedup_keys").fetchone()[0]
+        return urls + keys
+
+    def _open_bloom(self, capacity, error_rate):
+        """Load bloom dari file; rebuild dari SQLite jika tidak sinkron (mis. ditulis worker lain)."""
+        expected = self._row_count()
+        if os.path.exists(self.bloom_path):
+            try:
+                bloom = BloomFilter.load(self.bloom_path)
+                if bloom.count == expected:
+                    return bloom
+            except Exception:
+                pass
+        bloom = BloomFilter(max(capacity, expected * 2), error_rate)
+        for (url,) in self.conn.execute("SELECT url FROM dedup_urls"):
+            bloom.add("u:" + url)
+        for (key_hash,) in self.conn.execute("SELECT key_hash FROM dedup_keys"):
+            bloom.add("k:" + key_hash)
+        print(f"    * [Dedup bloom rebuilt: {bloom.count} entries]")
+        return bloom
+
+    def url_owner(self, url):
+        """Region pemilik URL, atau None jika belum pernah di-scrape."""
+        if not url or (self.bloom is not None and "u:" + url not in self.bloom):
+            return None
+        row = self.conn.execute(
+            "SELECT region FROM dedup_urls WHERE url = ?", (url,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def key_owner(self, dedup_key):
+        """Region pemilik tuple dedup, atau None."""
+        if not all(dedup_key):
+            return None
+        key_hash = hash_dedup_key(dedup_key)
+        if self.bloom is not None and "k:" + key_hash not in self.bloom:
+            return None
+        row = self.conn.execute(
+            "SELECT region FROM dedup_keys WHERE key_hash = ?", (key_hash,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, region, dedup_key, url):
+        """Catat listing; pemilik pertama tetap dipertahankan."""
+        now = datetime.now().isoformat()
+        key_hash = hash_dedup_key(dedup_key)
+        with self.conn:
+            if all(dedup_key):
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO dedup_keys (key_hash, region, url, first_seen)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key_hash, region, url, now),
+                )
+                if cur.rowcount and self.bloom is not None:
+                    self.bloom.add("k:" + key_hash)
+            if url:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO dedup_urls (url, region, first_seen) VALUES (?, ?, ?)",
+                    (url, region, now),
+                )
+                if cur.rowcount and self.bloom is not None:
+                    self.bloom.add("u:" + url)
+
+    def owner_regions(self):
+        """Semua region yang memiliki minimal satu listing di index."""
+        return [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT region FROM dedup_urls UNION SELECT region FROM dedup_keys"
+            )
+        ]
+
+    def release_region(self, region, keep_urls=(), keep_keys=()):
+        """
+        Lepas kepemilikan listing region yang tidak ada di keep_urls / keep_keys
+        (mis. hasil akhir re-scrape region, atau kosong jika file region hilang),
+        supaya region lain boleh meng-scrape listing itu. Bloom tidak bisa hapus
+        item; jawaban "mungkin ada" tetap dikonfirmasi SQLite. Return jumlah baris dihapus.
+        """
+        keep_urls = set(keep_urls)
+        keep_hashes = {hash_dedup_key(key) for key in keep_keys if all(key)}
+        stale_urls = [
+            (url,)
+            for (url,) in self.conn.execute("SELECT url FROM dedup_urls WHERE region = ?", (region,))
+            if url not in keep_urls
+        ]
+        stale_keys = [
+            (key_hash,)
+            for (key_hash,) in self.conn.execute(
+                "SELECT key_hash FROM dedup_keys WHERE region = ?", (region,)
+            )
+            if key_hash not in keep_hashes
+        ]
+        with self.conn:
+            self.conn.executemany("DELETE FROM dedup_urls WHERE url = ?", stale_urls)
+            self.conn.executemany("DELETE FROM dedup_keys WHERE key_hash = ?", stale_keys)
+        return len(stale_urls) + len(stale_keys)
+
+    def close(self):
+        if self.bloom is not None:
+            self.bloom.save(self.bloom_path)
+        self.conn.close()
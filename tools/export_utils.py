@@ -0,0 +1,224 @@
+"""
+Export dataset (master & per region) ke Parquet kolumnar.
+
+pyarrow opsional: hanya di-import saat export dijalankan.
+    pip install pyarrow
+
+Contoh:
+    python -m tools.export_utils --per-region
+"""
+
+import os
+import json
+import glob
+import argparse
+from datetime import datetime
+
+from tools.config import PATHS
+from tools.parse_utils import KATEGORI_TEMPLATES
+
+# Kolom text biasa & kolom yang di-dictionary-encode (nilai sedikit, banyak berulang)
+STRING_COLUMNS = [
+    "nama_kos",
+    "rating",
+    "jumlah_review",
+    "total_transaksi",
+    "harga",
+    "alamat",
+    "url",
+]
+DICTIONARY_COLUMNS = ["region", "area", "jenis_kos", "periode"]
+FACILITY_CATEGORIES = list(dict.fromkeys(list(KATEGORI_TEMPLATES) + ["umum"]))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Export Parquet butuh pyarrow (opsional). Install dulu: pip install pyarrow"
+        ) from None
+    return pa, pq
+
+
+def parquet_schema(pa):
+    """Schema Parquet: string, dictionary, timestamp, struct fasilitas, list peraturan & landmark."""
+    fields = [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    fields += [pa.field(name, pa.string()) for name in STRING_COLUMNS]
+    fields.append(pa.field("scraped_at", pa.timestamp("us")))
+    fields.append(
+        pa.field(
+            "fasilitas",
+            pa.struct([pa.field(category, pa.list_(pa.string())) for category in FACILITY_CATEGORIES]),
+        )
+    )
+    fields.append(pa.field("peraturan", pa.list_(pa.string())))
+    fields.append(
+        pa.field(
+            "landmarks",
+            pa.list_(pa.struct([pa.field("nama", pa.string()), pa.field("jarak", pa.string())])),
+        )
+    )
+    return pa.schema(fields)
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _facilities(value):
+    """Kategori di luar schema (data lama / template berubah) masuk ke "umum"."""
+    result = {category: [] for category in FACILITY_CATEGORIES}
+    if isinstance(value, dict):
+        for category, labels in value.items():
+            target = category if category in result else "umum"
+            result[target].extend(str(label) for label in labels or [])
+    elif isinstance(value, list):
+        result["umum"].extend(str(label) for label in value)
+    return result
+
+
+def _landmarks(value):
+    if not isinstance(value, list):
+        return []
+    return [
+        {"nama": str(item.get("nama", "")), "jarak": str(item.get("jarak", ""))}
+        for item in value
+        if isinstance(item, dict)
+    ]
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def records_to_columns(records, region):
+    """Record dict -> dict kolom (list per kolom) siap jadi pyarrow Table. Non-dict di-skip."""
+    columns = {name: [] for name in DICTIONARY_COLUMNS + STRING_COLUMNS}
+    columns.update(scraped_at=[], fasilitas=[], peraturan=[], landmarks=[])
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        columns["region"].append(region)
+        for name in DICTIONARY_COLUMNS[1:] + STRING_COLUMNS:
+            columns[name].append(_text(record.get(name)))
+        columns["scraped_at"].append(_parse_timestamp(record.get("scraped_at")))
+        columns["fasilitas"].append(_facilities(record.get("fasilitas")))
+        peraturan = record.get("peraturan")
+        columns["peraturan"].append([str(r) for r in peraturan] if isinstance(peraturan, list) else [])
+        columns["landmarks"].append(_landmarks(record.get("landmarks")))
+    return columns
+
+
+def _table(pa, schema, columns):
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def iter_region_records(regions_folder):
+    """
+    Yield (region, records) per region file, urut nama. Hanya satu region di memory.
+    Record yang bukan object dibuang (dilaporkan per region).
+    """
+    for region_file in sorted(glob.glob(f"{regions_folder}/*.json")):
+        region = os.path.basename(region_file)[: -len(".json")]
+        try:
+            with open(region_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"    X [Error reading {region_file}: {e}]")
+            continue
+        if not isinstance(records, list):
+            continue
+        valid = [record for record in records if isinstance(record, dict)]
+        if len(valid) < len(records):
+            print(f"    X [{region}: {len(records) - len(valid)} record bukan object di-skip]")
+        yield region, valid
+
+
+def export_parquet(
+    regions_folder,
+    output_path,
+    per_region_folder=None,
+    row_group_size=20_000,
+    compression="zstd",
+):
+    """
+    Tulis semua region ke satu file Parquet (opsional juga satu file per region).
+    Record ditulis per row group sebesar row_group_size, jadi memori dibatasi
+    oleh satu region + satu row group, bukan seluruh dataset.
+
+    Returns:
+        int: Jumlah record yang diexport
+    """
+    pa, pq = _require_pyarrow()
+    schema = parquet_schema(pa)
+    folder = os.path.dirname(output_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if per_region_folder:
+        os.makedirs(per_region_folder, exist_ok=True)
+
+    tmp_path = f"{output_path}.tmp"
+    total = 0
+    buffer = {name: [] for name in schema.names}
+    buffered = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression=compression) as writer:
+            for region, records in iter_region_records(regions_folder):
+                for start in range(0, len(records), row_group_size):
+                    columns = records_to_columns(records[start : start + row_group_size], region)
+                    for name in schema.names:
+                        buffer[name].extend(columns[name])
+                    buffered += len(columns["region"])
+                    if buffered >= row_group_size:
+                        writer.write_table(_table(pa, schema, buffer), row_group_size=row_group_size)
+                        buffer = {name: [] for name in schema.names}
+                        buffered = 0
+                if per_region_folder:
+                    region_path = f"{per_region_folder}/{region}.parquet"
+                    pq.write_table(
+                        _table(pa, schema, records_to_columns(records, region)),
+                        region_path,
+                        compression=compression,
+                        row_group_size=row_group_size,
+                    )
+                total += len(records)
+                print(f"    * [Parquet: {region} | {len(records)} records]")
+            if buffered:
+                writer.write_table(_table(pa, schema, buffer), row_group_size=row_group_size)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        # Export gagal / dihentikan: jangan tinggalkan file .tmp setengah jadi
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(f"  * [Parquet export: {total} records → {output_path}]")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export dataset region ke Parquet")
+    parser.add_argument("--regions-folder", default=PATHS["regions_folder"])
+    parser.add_argument("--output", default=PATHS["parquet_file"])
+    parser.add_argument(
+        "--per-region", action="store_true", help="Tulis juga satu file Parquet per region"
+    )
+    parser.add_argument("--row-group-size", type=int, default=20_000)
+    args = parser.parse_args()
+    export_parquet(
+        args.regions_folder,
+        args.output,
+        PATHS["parquet_regions_folder"] if args.per_region else None,
+        args.row_group_size,
+    )
@@ -0,0 +1,122 @@
+"""Append-only JSONL journal per region, pengganti backup full-rewrite"""
+
+import os
+import json
+import time
+
+from tools.master_utils import format_master_records
+from tools.metrics_utils import span, observe
+
+
+def read_journal(journal_path):
+    """
+    Baca record dari journal JSONL. Baris terakhir yang terpotong (crash saat
+    menulis) diabaikan.
+    """
+    records = []
+    if not os.path.exists(journal_path):
+        return records
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+class RegionJournal:
+    """
+    Tulis record region satu per baris (JSONL) secara append.
+    Flush tiap `flush_every` record, fsync tiap `fsync_every` flush, jadi run
+    yang terhenti paling banyak kehilangan satu batch.
+    finalize() menulis region file secara atomic lalu menghapus journal.
+    on_flush(records) dipanggil setelah batch benar-benar tertulis ke disk.
+    """
+
+    def __init__(self, region, backup_folder, flush_every=50, fsync_every=1, on_flush=None):
+        os.makedirs(backup_folder, exist_ok=True)  # Ensure folder exists
+        self.region = region
+        self.journal_path = f"{backup_folder}/{region}.jsonl"
+        self.flush_every = max(1, flush_every)
+        self.fsync_every = max(0, fsync_every)
+        self.on_flush = on_flush
+        self.pending = []
+        self.flushes = 0
+        self.recovered = self._truncate_partial_line()
+        self.file = open(self.journal_path, "a", encoding="utf-8")
+
+    def _truncate_partial_line(self):
+        """Buang baris terakhir yang terpotong lalu return record yang masih utuh."""
+        records = read_journal(self.journal_path)
+        if os.path.exists(self.journal_path):
+            tmp_path = f"{self.journal_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.journal_path)
+        if records:
+            print(f"      * [Recovered {len(records)} records from journal: {self.journal_path}]")
+        return records
+
+    def append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.pending.append(record)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def seed(self, records):
+        """Tulis record yang sudah ada (mis. region file saat replay) sekaligus, satu fsync."""
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def flush(self):
+        if not self.pending:
+            return
+        with span("journal_flush"):
+            self.file.flush()
+            self.flushes += 1
+            if self.fsync_every and self.flushes % self.fsync_every == 0:
+                os.fsync(self.file.fileno())
+        print(f"      * [Data Backup: {len(self.pending)} records appended]")
+        if self.on_flush is not None:
+            self.on_flush(self.pending)
+        self.pending = []
+
+    def finalize(self, regions_folder):
+        """Tulis journal ke region file (atomic, streaming) lalu hapus journal."""
+        self.flush()
+        self.file.close()
+        started = time.perf_counter()
+        os.makedirs(regions_folder, exist_ok=True)  # Ensure folder exists
+        region_path = f"{regions_folder}/{self.region}.json"
+        tmp_path = f"{region_path}.tmp"
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[")
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    out.write("\n" if count == 0 else ",\n")
+                    out.write(format_master_records([json.loads(line)]))
+                    count += 1
+            out.write("]" if count == 0 else "\n]")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, region_path)
+        os.remove(self.journal_path)
+        observe("region_save", time.perf_counter() - started)
+        print(f"      * [Save Data Region: {self.region} | {count} records]")
+        return count
+
+    def close(self):
+        """Tutup tanpa finalize (journal tetap ada untuk recovery)."""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
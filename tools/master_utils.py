@@ -0,0 +1,161 @@
+"""Incremental master file builder berbasis manifest per region"""
+
+import os
+import json
+import glob
+import hashlib
+import shutil
+
+MANIFEST_NAME = "master_manifest.json"
+CACHE_FOLDER_NAME = "master_cache"
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash isi file secara streaming."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict) and isinstance(manifest.get("regions"), dict):
+            return manifest
+    except Exception:
+        pass
+    return {"regions": {}, "master": {}}
+
+
+def save_manifest(manifest, manifest_path):
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def format_master_records(records):
+    """
+    Serialisasi record persis seperti elemen array di
+    json.dump(all_data, indent=2): tiap record ter-indent 2 spasi, dipisah ",\n".
+    """
+    return ",\n".join(
+        "  " + json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        for record in records
+    )
+
+
+def _write_fragment(region_file, fragment_path):
+    """Baca satu region file dan tulis fragment master-nya. Return jumlah record."""
+    with open(region_file, "r", encoding="utf-8") as f:
+        region_data = json.load(f)
+    if not isinstance(region_data, list):
+        raise ValueError("Invalid format (expected list)")
+    tmp_path = f"{fragment_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(format_master_records(region_data))
+    os.replace(tmp_path, fragment_path)
+    return len(region_data)
+
+
+def generate_master_file(regions_folder, data_dir, master_file, full_rebuild=False):
+    """
+    Generate master file dari semua region files yang ada.
+    Hanya region yang berubah (size/mtime/hash) yang dibaca ulang; region lain
+    dipakai dari fragment cache dan master ditulis secara streaming.
+    """
+    os.makedirs(data_dir, exist_ok=True)  # Ensure folder exists
+    manifest_path = f"{data_dir}/{MANIFEST_NAME}"
+    cache_folder = f"{data_dir}/{CACHE_FOLDER_NAME}"
+    os.makedirs(cache_folder, exist_ok=True)
+    master_path = f"{data_dir}/{master_file}"
+
+    manifest = {"regions": {}, "master": {}} if full_rebuild else load_manifest(manifest_path)
+    old_entries = manifest["regions"]
+    new_entries = {}
+    changed = 0
+
+    region_files = sorted(glob.glob(f"{regions_folder}/*.json"))
+    print(f"\n  * [Generating master file from {len(region_files)} region files...]")
+
+    for region_file in region_files:
+        region_name = os.path.basename(region_file).replace(".json", "")
+        fragment_path = f"{cache_folder}/{region_name}.fragment"
+        stat = os.stat(region_file)
+        entry = old_entries.get(region_name)
+
+        fragment_ok = entry is not None and os.path.exists(fragment_path)
+        if fragment_ok and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            new_entries[region_name] = entry
+            continue
+
+        try:
+            content_hash = file_sha256(region_file)
+            if fragment_ok and entry["sha256"] == content_hash:
+                # Cuma ke-touch, isinya sama
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)
+                new_entries[region_name] = entry
+                continue
+            records = _write_fragment(region_file, fragment_path)
+        except Exception as e:
+            print(f"    X [Error reading {region_file}: {e}]")
+            continue
+
+        new_entries[region_name] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": content_hash,
+            "records": records,
+        }
+        changed += 1
+        print(f"    * [Added {records} records from {region_name}]")
+
+    # Fragment region yang file-nya sudah dihapus
+    removed = [name for name in old_entries if name not in new_entries]
+    for region_name in removed:
+        fragment_path = f"{cache_folder}/{region_name}.fragment"
+        if os.path.exists(fragment_path):
+            os.remove(fragment_path)
+
+    total_records = sum(entry["records"] for entry in new_entries.values())
+    master_info = manifest.get("master", {})
+    master_fresh = (
+        not changed
+        and not removed
+        and os.path.exists(master_path)
+        and master_info.get("size") == os.path.getsize(master_path)
+        and master_info.get("regions") == sorted(new_entries)
+    )
+    if master_fresh:
+        print(f"  * [Master file up-to-date: {total_records} total records → {master_path}]")
+        return total_records
+
+    # Save master file (streaming gabung fragment, tidak load semua data ke memory)
+    tmp_path = f"{master_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        first = True
+        for region_name in sorted(new_entries):
+            if not new_entries[region_name]["records"]:
+                continue
+            out.write("\n" if first else ",\n")
+            first = False
+            with open(f"{cache_folder}/{region_name}.fragment", "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+        out.write("]" if first else "\n]")
+    os.replace(tmp_path, master_path)
+
+    manifest = {
+        "regions": new_entries,
+        "master": {"size": os.path.getsize(master_path), "regions": sorted(new_entries)},
+    }
+    save_manifest(manifest, manifest_path)
+
+    print(
+        f"  * [Master file generated: {total_records} total records → {master_path}"
+        f" | Changed regions: {changed}, removed: {len(removed)}]"
+    )
+    return total_records
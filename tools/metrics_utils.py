@@ -0,0 +1,250 @@
+"""Timer per fase scraping, agregasi per region, export JSON run report & Prometheus"""
+
+import os
+import json
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Registry global per proses (tiap worker punya sendiri), dibaca di akhir run
+METRICS = {
+    "started_at": datetime.now().isoformat(),
+    "region": "",
+    "timers": {},  # (phase, region) -> PhaseHistogram
+    "counters": {},  # (event, region) -> total
+    "gauges": {},  # (name, region) -> nilai terakhir
+    "extra": {},  # Data tambahan run report (region_stats, block stats, dst)
+}
+
+
+# Batas atas bucket histogram durasi (detik); memori per (phase, region) tetap
+PHASE_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600,
+)
+
+# Gauge yang dikenal -> HELP Prometheus (gauge lain tetap diekspor, HELP generik)
+GAUGE_HELP = {
+    "rate_rps": "Rate request detail terkini (request/detik)",
+    "circuit_open": "Circuit breaker koneksi open (1) / closed (0)",
+    "site_latency_ms": "Latency probe site target terakhir (ms)",
+    "browser_rss_mb": "RSS driver + Chromium terakhir (MB)",
+    "listing_cards": "Jumlah card di list page region",
+}
+
+
+class PhaseHistogram:
+    """
+    Durasi satu (phase, region) dalam bucket tetap + count/sum/max, jadi memori
+    tidak tumbuh dengan jumlah sample. p50/p95 diestimasi dari bucket
+    (interpolasi linear, seperti histogram_quantile Prometheus).
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(PHASE_BUCKETS) + 1)  # Slot terakhir = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = 0
+        while index < len(PHASE_BUCKETS) and seconds > PHASE_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for index, value in enumerate(other.buckets):
+            self.buckets[index] += value
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        cumulative = 0
+        for index, value in enumerate(self.buckets):
+            if cumulative + value >= rank:
+                lower = PHASE_BUCKETS[index - 1] if index else 0.0
+                upper = PHASE_BUCKETS[index] if index < len(PHASE_BUCKETS) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / value
+                return min(estimate, self.max)
+            cumulative += value
+        return self.max
+
+
+def reset_metrics():
+    METRICS["started_at"] = datetime.now().isoformat()
+    METRICS["region"] = ""
+    for key in ("timers", "counters", "gauges", "extra"):
+        METRICS[key].clear()
+
+
+def set_region(region):
+    """Region aktif; dipakai sebagai label default semua metric berikutnya."""
+    METRICS["region"] = region or ""
+
+
+def observe(phase, seconds, region=None):
+    key = (phase, METRICS["region"] if region is None else region)
+    histogram = METRICS["timers"].get(key)
+    if histogram is None:
+        histogram = METRICS["timers"][key] = PhaseHistogram()
+    histogram.add(seconds)
+
+
+def incr(event, value=1, region=None):
+    key = (event, METRICS["region"] if region is None else region)
+    METRICS["counters"][key] = METRICS["counters"].get(key, 0) + value
+
+
+def set_gauge(name, value, region=None):
+    METRICS["gauges"][(name, METRICS["region"] if region is None else region)] = value
+
+
+@contextmanager
+def span(phase, region=None):
+    """Ukur durasi blok `with` (tetap tercatat walau blok raise exception)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(phase, time.perf_counter() - started, region)
+
+
+def summarize_timer(histogram):
+    return {
+        "count": histogram.count,
+        "total": round(histogram.total, 4),
+        "mean": round(histogram.total / histogram.count, 4) if histogram.count else 0.0,
+        "p50": round(histogram.quantile(0.5), 4),
+        "p95": round(histogram.quantile(0.95), 4),
+        "max": round(histogram.max, 4),
+    }
+
+
+def build_run_report(extra=None):
+    """
+    Run report: total per fase (gabungan semua region) + rincian per region.
+
+    Returns:
+        dict: {started_at, finished_at, phases, counters, regions, ...extra}
+    """
+    merged = {}
+    regions = {}
+    for (phase, region), histogram in METRICS["timers"].items():
+        merged.setdefault(phase, PhaseHistogram()).merge(histogram)
+        regions.setdefault(region or "_global", {}).setdefault("phases", {})[phase] = (
+            summarize_timer(histogram)
+        )
+    counters = {}
+    for (event, region), value in METRICS["counters"].items():
+        counters[event] = counters.get(event, 0) + value
+        regions.setdefault(region or "_global", {}).setdefault("counters", {})[event] = value
+    for (name, region), value in METRICS["gauges"].items():
+        regions.setdefault(region or "_global", {}).setdefault("gauges", {})[name] = value
+
+    report = {
+        "started_at": METRICS["started_at"],
+        "finished_at": datetime.now().isoformat(),
+        "phases": {
+            phase: summarize_timer(histogram) for phase, histogram in sorted(merged.items())
+        },
+        "counters": dict(sorted(counters.items())),
+        "regions": regions,
+    }
+    report.update(METRICS["extra"])
+    if extra:
+        report.update(extra)
+    return report
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items()) + "}"
+
+
+def _metric_name(name):
+    """Nama gauge -> nama metric Prometheus yang valid ([a-zA-Z0-9_])."""
+    return "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+
+
+def format_prometheus(prefix="mamikos_scraper"):
+    """Metric dalam Prometheus text exposition format (untuk textfile collector)."""
+    lines = [
+        f"# HELP {prefix}_phase_seconds Durasi per fase scraping",
+        f"# TYPE {prefix}_phase_seconds histogram",
+    ]
+    for (phase, region), histogram in sorted(METRICS["timers"].items()):
+        cumulative = 0
+        for upper, value in zip(PHASE_BUCKETS + ("+Inf",), histogram.buckets):
+            cumulative += value
+            labels = _labels(phase=phase, region=region, le=upper)
+            lines.append(f"{prefix}_phase_seconds_bucket{labels} {cumulative}")
+        labels = _labels(phase=phase, region=region)
+        lines.append(f"{prefix}_phase_seconds_sum{labels} {histogram.total:.6f}")
+        lines.append(f"{prefix}_phase_seconds_count{labels} {histogram.count}")
+
+    lines += [
+        f"# HELP {prefix}_events_total Jumlah kejadian (card, duplikat, gagal, dst)",
+        f"# TYPE {prefix}_events_total counter",
+    ]
+    for (event, region), value in sorted(METRICS["counters"].items()):
+        lines.append(f"{prefix}_events_total{_labels(event=event, region=region)} {value}")
+
+    # Satu metric per gauge (mis. mamikos_scraper_rate_rps), bukan _gauge{name=...}
+    gauges = {}
+    for (name, region), value in sorted(METRICS["gauges"].items()):
+        gauges.setdefault(name, []).append((region, value))
+    for name, values in gauges.items():
+        metric = f"{prefix}_{_metric_name(name)}"
+        lines += [
+            f"# HELP {metric} {GAUGE_HELP.get(name, f'Nilai terakhir {name}')}",
+            f"# TYPE {metric} gauge",
+        ]
+        for region, value in values:
+            lines.append(f"{metric}{_labels(region=region)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, content):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_metrics(report_path, prom_path=None, extra=None):
+    """
+    Tulis run report JSON (+ file Prometheus jika prom_path diisi).
+    `extra` diingat, jadi penulisan ulang berikutnya tetap memuatnya.
+    """
+    METRICS["extra"].update(extra or {})
+    report = build_run_report()
+    _write_atomic(report_path, json.dumps(report, ensure_ascii=False, indent=2))
+    if prom_path:
+        _write_atomic(prom_path, format_prometheus())
+    print(f"  * [Metrics report saved: {report_path}]")
+    return report
+
+
+def format_phase_summary(limit=8):
+    """Ringkasan fase paling mahal (total detik) untuk log akhir run."""
+    report = build_run_report()
+    top = sorted(report["phases"].items(), key=lambda item: item[1]["total"], reverse=True)
+    return " | ".join(
+        f"{phase}: {stats['total']:.1f}s/{stats['count']}" for phase, stats in top[:limit]
+    )
@@ -1,13 +1,309 @@
+"""
+Monitor koneksi di background + circuit breaker.
+
+Thread monitor mem-probe koneksi (TCP ke host:port) dan site target (HTTP HEAD,
+dicatat latency-nya) tiap `interval` detik. Scraping cukup cek state breaker
+(tanpa probe) sebelum tiap region / batch; saat circuit open scraping di-pause
+dan lanjut sendiri begitu probe sukses lagi, tidak exit.
+"""
+
+import time
 import socket
-from tools.config import SCRAPER_CONFIG
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlparse
+
+from tools.metrics_utils import incr, observe, set_gauge
+
+# Pesan error navigasi Chromium yang berarti jaringan / site tidak terjangkau
+NETWORK_ERROR_MARKERS = (
+    "net::ERR_INTERNET_DISCONNECTED",
+    "net::ERR_NAME_NOT_RESOLVED",
+    "net::ERR_CONNECTION",
+    "net::ERR_NETWORK",
+    "net::ERR_ADDRESS_UNREACHABLE",
+    "net::ERR_TIMED_OUT",
+    "net::ERR_PROXY_CONNECTION_FAILED",
+)
+
+# Status balasan HEAD dari server yang tidak mendukung HEAD: site tetap terjangkau
+HEAD_UNSUPPORTED = (405, 501)
+
+
+def is_network_error(error):
+    """Error jaringan (atau timeout, yang bisa jadi jaringan) -> perlu dikonfirmasi probe."""
+    if isinstance(error, (OSError, urllib.error.URLError)):
+        return True
+    message = str(error)
+    return "Timeout" in type(error).__name__ or any(m in message for m in NETWORK_ERROR_MARKERS)
+
+
+def probe_tcp(host, port, timeout):
+    """Buka lalu tutup koneksi TCP. Return latency (detik) atau raise OSError."""
+    started = time.perf_counter()
+    with socket.create_connection((host, port), timeout=timeout):
+        return time.perf_counter() - started
+
 
+def probe_http(url, timeout):
+    """
+    HEAD ke url. Status < 500 (termasuk 403/429) berarti site terjangkau;
+    405/501 (server tidak mendukung HEAD) juga dianggap terjangkau.
 
-def check_internet(host="8.8.8.8", port=53, timeout=None):
-    if timeout is None:
-        timeout = SCRAPER_CONFIG.get("internet_check_timeout", 3)
+    Returns:
+        tuple: (status, latency detik); status None jika tidak terjangkau
+    """
+    request = urllib.request.Request(url, method="HEAD", headers={"User-Agent": "Mozilla/5.0"})
+    started = time.perf_counter()
     try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (OSError, urllib.error.URLError):
+        status = None
+    return status, time.perf_counter() - started
+
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold kegagalan beruntun) -> open -> probe ulang tiap
+    reset_timeout (half_open selama probe) -> sukses: closed / gagal: open lagi.
+    """
+
+    def __init__(self, failure_threshold=2, reset_timeout=5.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.last_reason = None
+        self.opened_at = None
+        self.cond = threading.Condition()
+
+    @property
+    def closed(self):
+        return self.state == "closed"
+
+    def half_open(self):
+        with self.cond:
+            if self.state == "open":
+                self.state = "half_open"
+
+    def record_success(self):
+        with self.cond:
+            recovered = self.state != "closed"
+            self.state = "closed"
+            self.failures = 0
+            if recovered:
+                set_gauge("circuit_open", 0, region="")
+                self.cond.notify_all()
+        return recovered
+
+    def record_failure(self, reason):
+        """Return True jika kegagalan ini membuat circuit open."""
+        with self.cond:
+            self.failures += 1
+            self.last_reason = reason
+            if self.state == "half_open":
+                # Probe ulang gagal: tetap open, bukan trip baru
+                self.state = "open"
+                return False
+            if self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+                return True
+            return False
+
+    def trip(self, reason):
+        """Open langsung tanpa menunggu threshold (mis. probe awal gagal)."""
+        with self.cond:
+            self.last_reason = reason
+            if self.state == "closed":
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        incr("circuit_trips", region="")
+        set_gauge("circuit_open", 1, region="")
+
+
+class ConnectivityMonitor:
+    """
+    Thread probe koneksi & site target yang mengisi CircuitBreaker.
+    enabled=False -> semua method no-op (perilaku lama tanpa cek koneksi).
+    """
+
+    def __init__(
+        self,
+        host="8.8.8.8",
+        port=53,
+        target_url=None,
+        timeout=3.0,
+        interval=15.0,
+        reset_timeout=5.0,
+        failure_threshold=2,
+        pause_log_every=30.0,
+        enabled=True,
+    ):
+        self.host = host
+        self.port = port
+        self.target_url = target_url
+        self.timeout = timeout
+        self.interval = interval
+        self.pause_log_every = pause_log_every
+        self.enabled = enabled
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.last_probe = 0.0
+        self.probes = 0
+        self.paused_seconds = 0.0
+        self._probe_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, base_url=None):
+        config = dict(config or {})
+        if not config.get("target_url") and base_url:
+            parsed = urlparse(base_url)
+            config["target_url"] = f"{parsed.scheme}://{parsed.netloc}/"
+        return cls(**config)
+
+    # --- Probe ---
+
+    def probe(self):
+        """
+        Satu probe: TCP ke host:port lalu HEAD ke target_url (jika ada).
+
+        Returns:
+            tuple: (ok, reason) reason None jika ok
+        """
+        try:
+            probe_tcp(self.host, self.port, self.timeout)
+        except OSError as e:
+            return False, f"tcp: {e}"
+        if self.target_url:
+            status, latency = probe_http(self.target_url, self.timeout)
+            if status is None:
+                return False, "site unreachable"
+            set_gauge("site_latency_ms", round(latency * 1000, 1), region="")
+            if status >= 500 and status not in HEAD_UNSUPPORTED:
+                return False, f"site HTTP {status}"
+        return True, None
+
+    def check(self):
+        """Probe sekarang (sinkron) dan update breaker. Return True jika sehat."""
+        with self._probe_lock:
+            self.breaker.half_open()
+            ok, reason = self.probe()
+            self.probes += 1
+            self.last_probe = time.monotonic()
+        if ok:
+            if self.breaker.record_success():
+                print("  * [Koneksi pulih | circuit closed]")
+        elif self.breaker.record_failure(reason):
+            print(f"  X [Koneksi bermasalah: {reason} | circuit open, scraping di-pause]")
+        return ok
+
+    # --- Thread ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.interval if self.breaker.closed else self.breaker.reset_timeout
+            self._wake.wait(wait)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.check()
+            except Exception as e:
+                print(f"    X [Connectivity monitor error: {e}]")
+
+    def start(self):
+        """Probe awal (sinkron, supaya run yang mulai offline langsung pause) lalu start thread."""
+        if not self.enabled or self._thread is not None:
+            return self
+        if not self.check():
+            self.breaker.trip(self.breaker.last_reason)
+        self._thread = threading.Thread(target=self._run, name="connectivity-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout * 2 + 1)
+            self._thread = None
+
+    # --- Dipakai scraping ---
+
+    def wait_until_healthy(self):
+        """
+        Return langsung jika circuit closed (tanpa probe). Jika open, blok sampai
+        monitor melihat koneksi pulih. Return lama pause (detik).
+        """
+        if not self.enabled or self.breaker.closed:
+            return 0.0
+        started = time.monotonic()
+        print(f"  X [Scraping di-pause: {self.breaker.last_reason} | menunggu koneksi pulih...]")
+        self._wake.set()
+        with self.breaker.cond:
+            while not self.breaker.closed and not self._stop.is_set():
+                if not self.breaker.cond.wait(timeout=self.pause_log_every):
+                    waited = time.monotonic() - started
+                    print(f"    X [Masih menunggu koneksi | {waited:.0f}s | {self.breaker.last_reason}]")
+        paused = time.monotonic() - started
+        self.paused_seconds += paused
+        observe("connectivity_pause", paused, region="")
+        print(f"  * [Scraping dilanjutkan setelah pause {paused:.1f}s]")
+        return paused
+
+    def report_error(self, error):
+        """
+        Laporkan error navigasi. Error jaringan (termasuk timeout halaman) hanya
+        memicu satu probe konfirmasi (maks sekali per reset_timeout); circuit baru
+        open jika probe itu gagal, jadi halaman lambat tidak mem-pause scraping
+        (timeout sudah ditangani rate controller). Return True jika error dianggap
+        masalah koneksi.
+        """
+        if not self.enabled or not is_network_error(error):
+            return False
+        if self.breaker.closed and time.monotonic() - self.last_probe >= self.breaker.reset_timeout:
+            if not self.check() and self.breaker.closed:
+                self.breaker.trip(self.breaker.last_reason)
+                print(f"  X [Koneksi bermasalah: {self.breaker.last_reason} | circuit open, scraping di-pause]")
         return True
-    except Exception:
-        return False
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "state": self.breaker.state,
+            "trips": self.breaker.trips,
+            "probes": self.probes,
+            "paused_seconds": round(self.paused_seconds, 2),
+        }
+
+
+_monitor = [None]
+
+
+def start_connectivity_monitor(config, base_url=None):
+    """Buat & start monitor global dari SCRAPER_CONFIG["connectivity"]."""
+    stop_connectivity_monitor()
+    _monitor[0] = ConnectivityMonitor.from_config(config, base_url).start()
+    return _monitor[0]
+
+
+def get_connectivity_monitor():
+    if _monitor[0] is None:
+        _monitor[0] = ConnectivityMonitor(enabled=False)
+    return _monitor[0]
+
+
+def stop_connectivity_monitor():
+    if _monitor[0] is not None:
+        _monitor[0].stop()
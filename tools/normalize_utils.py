@@ -0,0 +1,236 @@
+"""
+Normalisasi batch (vectorized) field display string jadi nilai bertipe:
+harga -> IDR & IDR/bulan (pakai periode), rating -> float, jumlah review &
+transaksi -> int, jarak landmark -> meter. Jumlah gagal parse dihitung per field.
+
+pandas/numpy opsional: hanya di-import saat normalisasi dijalankan.
+    pip install pandas
+
+Contoh:
+    python -m tools.normalize_utils
+    python -m tools.normalize_utils --master
+"""
+
+import os
+import json
+import argparse
+
+from tools.config import PATHS
+
+# Field hasil normalisasi (field mentah tetap dipertahankan)
+NORMALIZED_FIELDS = {
+    "harga": "harga_idr",
+    "harga_bulanan": "harga_bulanan_idr",
+    "rating": "rating_num",
+    "jumlah_review": "jumlah_review_num",
+    "total_transaksi": "total_transaksi_num",
+    "jarak": "jarak_m",
+}
+
+# Field mentah yang di-parse (kunci hitungan gagal parse)
+PARSED_FIELDS = ["harga", "periode", "rating", "jumlah_review", "total_transaksi", "jarak"]
+
+# Angka + satuan opsional: "1.250.000", "1,5 jt", "2rb", "350"
+_NUMBER_UNIT = r"(?P<num>\d[\d.,]*)\s*(?P<unit>juta|jt|ribu|rb|k)?\b"
+_MULTIPLIERS = {"juta": 1e6, "jt": 1e6, "ribu": 1e3, "rb": 1e3, "k": 1e3}
+# Lama periode dalam bulan
+_PERIOD_MONTHS = {"hari": 1 / 30.4375, "minggu": 12 / 52, "bulan": 1.0, "tahun": 12.0}
+
+
+def _require_pandas():
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        raise ImportError(
+            "Normalisasi butuh pandas & numpy (opsional). Install dulu: pip install pandas"
+        ) from None
+    return np, pd
+
+
+def _parse_amount(pd, series):
+    """
+    Series string -> float. Tanpa satuan: titik & koma dianggap pemisah ribuan
+    ("Rp1.250.000"). Dengan satuan (jt/rb/k): koma/titik terakhir = desimal ("1,5 jt").
+    """
+    parts = series.str.lower().str.extract(_NUMBER_UNIT)
+    num = parts["num"].str.rstrip(".,")
+    unit = parts["unit"]
+    plain = pd.to_numeric(num.str.replace(r"[.,]", "", regex=True), errors="coerce")
+    decimal = pd.to_numeric(
+        num.str.replace(r"[.,](?=.*[.,])", "", regex=True).str.replace(",", ".", regex=False),
+        errors="coerce",
+    )
+    multiplier = unit.map(_MULTIPLIERS).astype("float64")
+    return plain.where(unit.isna(), decimal * multiplier)
+
+
+def _parse_decimal(pd, series):
+    """Series string -> float dengan koma atau titik sebagai desimal ("4,5", "4.5")."""
+    num = series.str.extract(r"(\d+(?:[.,]\d+)?)", expand=False)
+    return pd.to_numeric(num.str.replace(",", ".", regex=False), errors="coerce")
+
+
+def _period_months(pd, series):
+    """
+    '/ bulan' -> 1, '/ 3 bulan' -> 3, '/ tahun' -> 12. Periode tidak dikenal -> NaN
+    (harga bulanan tetap dihitung dengan asumsi bulanan).
+    """
+    parts = series.str.lower().str.extract(r"(?P<count>\d+)?\s*(?P<unit>hari|minggu|bulan|tahun)")
+    count = pd.to_numeric(parts["count"], errors="coerce").fillna(1)
+    return count * parts["unit"].map(_PERIOD_MONTHS).astype("float64")
+
+
+def _parse_distance_m(pd, series):
+    """'1,2 km' -> 1200, '350 m' -> 350."""
+    parts = series.str.lower().str.extract(r"(?P<num>\d+(?:[.,]\d+)?)\s*(?P<unit>km|m)\b")
+    num = pd.to_numeric(parts["num"].str.replace(",", ".", regex=False), errors="coerce")
+    return num * parts["unit"].map({"km": 1000.0, "m": 1.0}).astype("float64")
+
+
+def _failures(raw, parsed):
+    """Jumlah nilai mentah tidak kosong yang gagal di-parse."""
+    present = raw.fillna("").str.strip() != ""
+    return int((present & parsed.isna()).sum())
+
+
+def _to_int_list(np, values):
+    return [None if np.isnan(v) else int(round(v)) for v in values]
+
+
+def _to_float_list(np, values, digits=2):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def normalize_records(records):
+    """
+    Normalisasi satu batch record sekaligus (satu kolom = satu operasi vectorized).
+    Record diupdate in-place dengan field di NORMALIZED_FIELDS.
+
+    Returns:
+        dict: Jumlah gagal parse per field
+    """
+    np, pd = _require_pandas()
+    records = [record for record in records if isinstance(record, dict)]
+    if not records:
+        return {field: 0 for field in PARSED_FIELDS}
+
+    def column(name):
+        return pd.Series([record.get(name) for record in records], dtype="object").astype("string")
+
+    harga_raw = column("harga")
+    periode_raw = column("periode")
+    rating_raw = column("rating")
+    review_raw = column("jumlah_review")
+    transaksi_raw = column("total_transaksi")
+
+    harga = _parse_amount(pd, harga_raw)
+    months = _period_months(pd, periode_raw)
+    harga_bulanan = harga / months.fillna(1.0)
+    rating = _parse_decimal(pd, rating_raw)
+    review = _parse_amount(pd, review_raw)
+    transaksi = _parse_amount(pd, transaksi_raw)
+
+    # Landmark: explode jadi satu baris per landmark, parse sekaligus, lalu tulis balik
+    targets = [
+        landmark
+        for record in records
+        for landmark in record.get("landmarks") or []
+        if isinstance(landmark, dict)
+    ]
+    distances = [landmark.get("jarak") for landmark in targets]
+    jarak_raw = pd.Series(distances, dtype="object").astype("string")
+    jarak = _parse_distance_m(pd, jarak_raw) if distances else pd.Series([], dtype="float64")
+
+    failures = {
+        "harga": _failures(harga_raw, harga),
+        "periode": _failures(periode_raw, months),
+        "rating": _failures(rating_raw, rating),
+        "jumlah_review": _failures(review_raw, review),
+        "total_transaksi": _failures(transaksi_raw, transaksi),
+        "jarak": _failures(jarak_raw, jarak) if distances else 0,
+    }
+
+    harga_values = _to_int_list(np, harga.to_numpy(dtype="float64", na_value=np.nan))
+    bulanan_values = _to_int_list(np, harga_bulanan.to_numpy(dtype="float64", na_value=np.nan))
+    rating_values = _to_float_list(np, rating.to_numpy(dtype="float64", na_value=np.nan))
+    review_values = _to_int_list(np, review.to_numpy(dtype="float64", na_value=np.nan))
+    transaksi_values = _to_int_list(np, transaksi.to_numpy(dtype="float64", na_value=np.nan))
+    for i, record in enumerate(records):
+        record[NORMALIZED_FIELDS["harga"]] = harga_values[i]
+        record[NORMALIZED_FIELDS["harga_bulanan"]] = bulanan_values[i]
+        record[NORMALIZED_FIELDS["rating"]] = rating_values[i]
+        record[NORMALIZED_FIELDS["jumlah_review"]] = review_values[i]
+        record[NORMALIZED_FIELDS["total_transaksi"]] = transaksi_values[i]
+
+    jarak_values = _to_int_list(np, jarak.to_numpy(dtype="float64", na_value=np.nan))
+    for landmark, value in zip(targets, jarak_values):
+        landmark[NORMALIZED_FIELDS["jarak"]] = value
+    return failures
+
+
+def _write_json(records, out_path):
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, out_path)
+
+
+def normalize_file(input_path, output_path):
+    """Normalisasi satu file JSON list record (mis. master file) dalam satu batch."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"Invalid format (expected list): {input_path}")
+    failures = normalize_records(records)
+    folder = os.path.dirname(output_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    _write_json(records, output_path)
+    print(f"  * [Normalized {len(records)} records → {output_path} | Failures: {failures}]")
+    return {"records": len(records), "failures": failures}
+
+
+def normalize_regions(regions_folder, output_folder):
+    """
+    Normalisasi semua region file (satu region = satu batch vectorized) dan tulis
+    ke output_folder dengan nama file yang sama.
+
+    Returns:
+        dict: {"records": total, "failures": {field: jumlah}}
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    # Import lokal supaya modul ini tidak menarik export_utils saat tidak dipakai
+    from tools.export_utils import iter_region_records
+
+    totals = {"records": 0, "failures": {}}
+    for region, records in iter_region_records(regions_folder):
+        failures = normalize_records(records)
+        _write_json(records, f"{output_folder}/{region}.json")
+        totals["records"] += len(records)
+        for field, count in failures.items():
+            totals["failures"][field] = totals["failures"].get(field, 0) + count
+        failed = ", ".join(f"{k}={v}" for k, v in failures.items() if v)
+        print(
+            f"    * [Normalized: {region} | {len(records)} records"
+            + (f" | Parse failures: {failed}]" if failed else "]")
+        )
+    print(f"  * [Normalized {totals['records']} records → {output_folder} | Failures: {totals['failures']}]")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalisasi harga, rating, jumlah & jarak (batch)")
+    parser.add_argument("--regions-folder", default=PATHS["regions_folder"])
+    parser.add_argument("--output-folder", default=PATHS["normalized_folder"])
+    parser.add_argument(
+        "--master", action="store_true", help="Normalisasi master file (bukan per region)"
+    )
+    args = parser.parse_args()
+    if args.master:
+        normalize_file(
+            f"{PATHS['data_dir']}/{PATHS['master_file']}",
+            f"{args.output_folder}/{PATHS['master_file']}",
+        )
+    else:
+        normalize_regions(args.regions_folder, args.output_folder)
@@ -0,0 +1,116 @@
+"""Pagination load more adaptif: berhenti saat plateau, link hilang, atau target tercapai"""
+
+import time
+
+from tools.metrics_utils import observe, set_gauge
+
+
+class PaginationController:
+    """
+    Lacak jumlah card setelah tiap klik load more dan putuskan kapan berhenti:
+    - "max_clicks"    : batas klik tercapai
+    - "target_reached": card sudah >= target (mis. --limit-card)
+    - "plateau"       : jumlah card tidak bertambah `plateau_patience` kali berturut-turut
+    - "no_load_more"  : link load more hilang / tidak muncul
+    - "error"         : klik gagal
+    """
+
+    def __init__(self, max_clicks, target_count=None, plateau_patience=1):
+        self.max_clicks = max_clicks
+        self.target_count = target_count
+        self.plateau_patience = max(1, plateau_patience)
+        self.clicks = 0
+        self.stale_clicks = 0
+        self.card_count = 0
+        self.stop_reason = None
+        self.started = time.monotonic()
+        self.click_seconds = []
+
+    def should_continue(self, card_count):
+        self.card_count = card_count
+        if self.stop_reason:
+            return False
+        if self.target_count and card_count >= self.target_count:
+            self.stop("target_reached")
+        elif self.clicks >= self.max_clicks:
+            self.stop("max_clicks")
+        elif self.stale_clicks >= self.plateau_patience:
+            self.stop("plateau")
+        return self.stop_reason is None
+
+    def record_click(self, previous_count, new_count, seconds):
+        self.clicks += 1
+        self.click_seconds.append(seconds)
+        self.stale_clicks = 0 if new_count > previous_count else self.stale_clicks + 1
+        self.card_count = new_count
+
+    def stop(self, reason):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+
+    def stats(self):
+        return {
+            "clicks": self.clicks,
+            "cards": self.card_count,
+            "stop_reason": self.stop_reason,
+            "seconds": round(time.monotonic() - self.started, 2),
+            "avg_click_seconds": (
+                round(sum(self.click_seconds) / len(self.click_seconds), 2)
+                if self.click_seconds
+                else 0.0
+            ),
+        }
+
+
+def paginate_listing(
+    page,
+    load_more_selector,
+    count_cards,
+    wait_for_growth,
+    controller,
+    link_timeout=2000,
+    first_link_timeout=None,
+    click_timeout=15000,
+    before_click=None,
+):
+    """
+    Klik load more sampai controller bilang berhenti.
+    count_cards() -> jumlah card saat ini;
+    wait_for_growth(previous_count) -> jumlah card setelah klik (sama jika tidak bertambah).
+    Link load more pertama ditunggu first_link_timeout (render awal), berikutnya
+    cukup link_timeout singkat: di akhir list link biasanya langsung hilang.
+
+    Returns:
+        dict: controller.stats()
+    """
+    card_count = count_cards()
+    while controller.should_continue(card_count):
+        try:
+            timeout = first_link_timeout if controller.clicks == 0 and first_link_timeout else link_timeout
+            page.locator(load_more_selector).first.wait_for(state="visible", timeout=timeout)
+        except Exception:
+            controller.stop("no_load_more")
+            break
+        try:
+            page.locator(load_more_selector).first.scroll_into_view_if_needed()
+            if before_click is not None:
+                before_click()
+            started = time.monotonic()
+            page.click(load_more_selector, timeout=click_timeout)
+            new_count = wait_for_growth(card_count)
+        except Exception:
+            controller.stop("error")
+            break
+        seconds = time.monotonic() - started
+        controller.record_click(card_count, new_count, seconds)
+        observe("load_more_click", seconds)
+        print(f"    * [Load More: {controller.clicks} | Cards: {new_count}]")
+        card_count = new_count
+
+    stats = controller.stats()
+    set_gauge("listing_cards", stats["cards"])
+    print(
+        f"    * [Load More stopped: {stats['stop_reason']} | Clicks: {stats['clicks']}"
+        f" | Cards: {stats['cards']} | {stats['seconds']}s]"
+    )
+    return stats
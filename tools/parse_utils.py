@@ -1,131 +1,250 @@
 """Data parsing and categorization utilities"""
 
-from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import List, Dict
 
 
-def safe_get_text(page, selector: str) -> str:
-    """Safely get text from selector"""
-    try:
-        el = page.query_selector(selector)
-        if el:
-            text = el.inner_text().strip()
-            return text if text else ""
-        return ""
-    except Exception:
-        return ""
-
-
-def safe_get_list(page, selector: str) -> List[str]:
-    """Safely get list of text from multiple elements"""
-    try:
-        elements = page.locator(selector)
-        result = []
-        for i in range(elements.count()):
-            text = elements.nth(i).inner_text().strip()
-            if text:
-                result.append(text)
-        return result
-    except Exception:
-        return []
+# Selector yang diambil sebagai list (semua elemen), sisanya cukup elemen pertama
+LIST_SELECTOR_KEYS = ("facilities", "rules", "landmark_names", "landmark_distances")
 
-
-def smart_kategorisasi(fasilitas_list: List[str]) -> Dict[str, List[str]]:
-    """Categorize facilities using similarity matching"""
-
-    def similarity(a: str, b: str) -> float:
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-
-    kategori_templates = {
-        "ukuran_listrik": [
-            "meter",
-            "listrik",
-            "termasuk listrik",
-            "tidak termasuk listrik",
-            "x",
-        ],
-        "kamar": [
-            "kasur",
-            "meja",
-            "lemari",
-            "ac",
-            "tv",
-            "bantal",
-            "cermin",
-            "guling",
-            "kursi",
-            "kipas",
-            "ventilasi",
-            "jendela",
-        ],
-        "kamar_mandi": [
-            "kloset",
-            "shower",
-            "wastafel",
-            "k. mandi",
-            "kamar mandi",
-            "ember",
-            "bak mandi",
-            "air panas",
-            "toilet",
-        ],
-        "umum": [
-            "wifi",
-            "kulkas",
-            "ruang cuci",
-            "ruang tamu",
-            "ruang jemur",
-            "dapur",
-            "dispenser",
-            "cctv",
-            "cleaning",
-            "penjaga",
-            "mesin cuci",
-            "laundry",
-            "mushola",
-            "jemuran",
-            "balcon",
-        ],
-        "parkir": ["parkir", "motor", "mobil", "sepeda", "garasi"],
+_BATCH_EXTRACT_JS = """([textSelectors, listSelectors]) => {
+    const result = {};
+    for (const [key, selector] of Object.entries(textSelectors)) {
+        try {
+            const el = document.querySelector(selector);
+            result[key] = el ? (el.innerText || "").trim() : "";
+        } catch (e) {
+            result[key] = "";
+        }
     }
-
-    result = {
-        "ukuran_listrik": [],
-        "kamar": [],
-        "kamar_mandi": [],
-        "umum": [],
-        "parkir": [],
+    for (const [key, selector] of Object.entries(listSelectors)) {
+        try {
+            result[key] = Array.from(document.querySelectorAll(selector)).map(
+                (el) => (el.innerText || "").trim()
+            );
+        } catch (e) {
+            result[key] = [];
+        }
     }
+    return result;
+}"""
+
+
+def batch_extract(page, selectors: Dict[str, str], list_keys=LIST_SELECTOR_KEYS) -> Dict:
+    """
+    Ambil text semua selector dalam satu page.evaluate (satu round-trip).
+    Key di list_keys -> list text semua elemen (belum difilter), sisanya ->
+    text elemen pertama. Selector gagal / tidak ada elemen -> "" / [].
+    """
+    text_selectors = {k: v for k, v in selectors.items() if k not in list_keys}
+    list_selectors = {k: v for k, v in selectors.items() if k in list_keys}
+    try:
+        result = page.evaluate(_BATCH_EXTRACT_JS, [text_selectors, list_selectors])
+    except Exception:
+        result = {}
+    if not isinstance(result, dict):
+        result = {}
+    for key in text_selectors:
+        if not isinstance(result.get(key), str):
+            result[key] = ""
+    for key in list_selectors:
+        if not isinstance(result.get(key), list):
+            result[key] = []
+    return result
 
-    for fasilitas in fasilitas_list:
-        best_category = "umum"  # default fallback
-        best_score = 0.3  # minimum threshold
 
-        for category, templates in kategori_templates.items():
-            for template in templates:
-                score = similarity(fasilitas, template)
+KATEGORI_TEMPLATES = {
+    "ukuran_listrik": [
+        "meter",
+        "listrik",
+        "termasuk listrik",
+        "tidak termasuk listrik",
+        "x",
+    ],
+    "kamar": [
+        "kasur",
+        "meja",
+        "lemari",
+        "ac",
+        "tv",
+        "bantal",
+        "cermin",
+        "guling",
+        "kursi",
+        "kipas",
+        "ventilasi",
+        "jendela",
+    ],
+    "kamar_mandi": [
+        "kloset",
+        "shower",
+        "wastafel",
+        "k. mandi",
+        "kamar mandi",
+        "ember",
+        "bak mandi",
+        "air panas",
+        "toilet",
+    ],
+    "umum": [
+        "wifi",
+        "kulkas",
+        "ruang cuci",
+        "ruang tamu",
+        "ruang jemur",
+        "dapur",
+        "dispenser",
+        "cctv",
+        "cleaning",
+        "penjaga",
+        "mesin cuci",
+        "laundry",
+        "mushola",
+        "jemuran",
+        "balcon",
+    ],
+    "parkir": ["parkir", "motor", "mobil", "sepeda", "garasi"],
+}
+
+
+def _bigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+class FacilityCategorizer:
+    """
+    Kategorisasi fasilitas yang dibangun sekali: template sudah di-normalize,
+    hasil label -> kategori disimpan di LRU cache (label yang sama berulang
+    di puluhan ribu listing).
+
+    backend:
+        "difflib" - SequenceMatcher.ratio(), hasil identik dengan versi lama
+        "ngram"   - Dice coefficient bigram karakter, jauh lebih cepat;
+                    cek selisihnya dengan compare_backends()
+    """
+
+    def __init__(
+        self,
+        templates: Dict[str, List[str]] = None,
+        threshold: float = 0.3,
+        default_category: str = "umum",
+        backend: str = "difflib",
+        cache_size: int = 4096,
+    ):
+        if backend not in ("difflib", "ngram"):
+            raise ValueError(f"Unknown categorizer backend: {backend}")
+        self.templates = templates or KATEGORI_TEMPLATES
+        self.threshold = threshold
+        self.default_category = default_category
+        self.backend = backend
+        self.categories = list(self.templates)
+        self._normalized = [
+            (category, template.lower())
+            for category, items in self.templates.items()
+            for template in items
+        ]
+        if backend == "difflib":
+            # Import lazy: command offline tidak perlu difflib
+            from difflib import SequenceMatcher
+
+            # seq2 di-set sekali per template, SequenceMatcher meng-cache analisisnya
+            self._matchers = []
+            for category, template in self._normalized:
+                matcher = SequenceMatcher(None)
+                matcher.set_seq2(template)
+                self._matchers.append((category, matcher))
+        else:
+            self._template_grams = [
+                (category, _bigrams(template)) for category, template in self._normalized
+            ]
+        self.categorize_label = lru_cache(maxsize=cache_size)(self._categorize_label)
+
+    def _categorize_label(self, label: str) -> str:
+        best_category = self.default_category
+        best_score = self.threshold
+        text = label.lower()
+
+        if self.backend == "difflib":
+            for category, matcher in self._matchers:
+                matcher.set_seq1(text)
+                # Upper bound murah dulu; ratio() hanya kalau masih bisa menang
+                if matcher.real_quick_ratio() <= best_score:
+                    continue
+                if matcher.quick_ratio() <= best_score:
+                    continue
+                score = matcher.ratio()
                 if score > best_score:
                     best_score = score
                     best_category = category
+        else:
+            grams = _bigrams(text)
+            for category, template_grams in self._template_grams:
+                score = 2 * len(grams & template_grams) / (len(grams) + len(template_grams))
+                if score > best_score:
+                    best_score = score
+                    best_category = category
+        return best_category
+
+    def categorize(self, fasilitas_list: List[str]) -> Dict[str, List[str]]:
+        """Kelompokkan list fasilitas ke kategori, urutan dalam kategori tetap."""
+        result = {category: [] for category in self.categories}
+        result.setdefault(self.default_category, [])
+        for fasilitas in fasilitas_list:
+            result[self.categorize_label(fasilitas)].append(fasilitas)
+        return result
 
-        result[best_category].append(fasilitas)
-
-    return result
-
-
-def extract_landmarks(page) -> List[Dict[str, str]]:
-    """Extract landmark information"""
-    landmarks = []
-    landmark_names = page.locator(".landmark-item__text-ellipsis")
-    landmark_distances = page.locator(".landmark-item__landmark-distance")
+    def compare_backends(self, labels: List[str], other: "FacilityCategorizer" = None) -> Dict:
+        """
+        Bandingkan hasil backend ini dengan backend lain (default: difflib)
+        untuk sekumpulan label unik.
+
+        Returns:
+            dict: total, agreement (0-1), mismatches [{label, <backend>: kategori}]
+        """
+        if other is None:
+            other = FacilityCategorizer(
+                self.templates, self.threshold, self.default_category, "difflib"
+            )
+        unique_labels = list(dict.fromkeys(labels))
+        mismatches = []
+        for label in unique_labels:
+            mine = self.categorize_label(label)
+            theirs = other.categorize_label(label)
+            if mine != theirs:
+                mismatches.append(
+                    {"label": label, self.backend: mine, f"{other.backend}_ref": theirs}
+                )
+        total = len(unique_labels)
+        return {
+            "total": total,
+            "agreement": (total - len(mismatches)) / total if total else 1.0,
+            "mismatches": mismatches,
+        }
+
+
+_default_categorizer = None
+
+
+def get_categorizer() -> FacilityCategorizer:
+    """Categorizer default per proses, dibangun sekali saat pertama dipakai."""
+    global _default_categorizer
+    if _default_categorizer is None:
+        _default_categorizer = FacilityCategorizer()
+    return _default_categorizer
 
-    for i in range(landmark_names.count()):
-        name = landmark_names.nth(i).inner_text().strip()
-        distance = (
-            landmark_distances.nth(i).inner_text().strip()
-            if i < landmark_distances.count()
-            else ""
-        )
-        landmarks.append({"nama": name, "jarak": distance})
 
-    return landmarks
+def smart_kategorisasi(fasilitas_list: List[str]) -> Dict[str, List[str]]:
+    """Categorize facilities using similarity matching"""
+    return get_categorizer().categorize(fasilitas_list)
+
+
+def pair_landmarks(names: List[str], distances: List[str]) -> List[Dict[str, str]]:
+    """Pasangkan nama & jarak landmark berdasarkan urutan"""
+    return [
+        {
+            "nama": name.strip(),
+            "jarak": distances[i].strip() if i < len(distances) else "",
+        }
+        for i, name in enumerate(names)
+    ]
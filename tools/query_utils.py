@@ -0,0 +1,384 @@
+"""
+Query engine lokal (SQLite) di atas region file: index B-tree untuk filter
+region/area/harga/rating, FTS5 untuk nama kos, alamat, fasilitas & nama landmark.
+
+Ingest incremental: region file yang hash-nya tidak berubah dilewati, region
+yang file-nya sudah tidak ada dihapus dari DB. Filter region = slug lengkap
+atau awalannya (mis. yogyakarta -> yogyakarta-kota-yogyakarta-...).
+Harga, rating & jarak dinormalisasi lewat tools.normalize_utils (butuh pandas).
+
+Contoh:
+    python -m tools.query_utils ingest
+    python -m tools.query_utils query --region yogyakarta --max-price 1500000 \\
+        --facility AC --facility WiFi --near kampus --limit 20
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+
+from tools.config import PATHS
+from tools.master_utils import file_sha256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id INTEGER PRIMARY KEY,
+    region TEXT NOT NULL,
+    area TEXT,
+    url TEXT,
+    nama_kos TEXT,
+    jenis_kos TEXT,
+    harga TEXT,
+    periode TEXT,
+    harga_idr INTEGER,
+    harga_bulanan_idr INTEGER,
+    rating REAL,
+    jumlah_review INTEGER,
+    total_transaksi INTEGER,
+    alamat TEXT,
+    scraped_at TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_listings_region_area ON listings (region, area);
+CREATE INDEX IF NOT EXISTS idx_listings_region_price ON listings (region, harga_bulanan_idr);
+CREATE INDEX IF NOT EXISTS idx_listings_price ON listings (harga_bulanan_idr);
+CREATE INDEX IF NOT EXISTS idx_listings_rating ON listings (rating);
+CREATE INDEX IF NOT EXISTS idx_listings_url ON listings (url);
+CREATE TABLE IF NOT EXISTS facilities (
+    listing_id INTEGER NOT NULL,
+    category TEXT,
+    label TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_facilities_label ON facilities (label, listing_id);
+CREATE TABLE IF NOT EXISTS landmarks (
+    listing_id INTEGER NOT NULL,
+    nama TEXT,
+    jarak_m INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_landmarks_listing ON landmarks (listing_id, jarak_m);
+CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+    nama_kos, alamat, fasilitas, landmarks, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS ingested_regions (
+    region TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+# Kolom hasil query (record mentah lengkap ada di kolom `record`)
+RESULT_COLUMNS = [
+    "region", "area", "nama_kos", "jenis_kos", "harga", "periode", "harga_bulanan_idr",
+    "rating", "jumlah_review", "alamat", "url",
+]
+SORT_COLUMNS = {
+    "harga": "l.harga_bulanan_idr IS NULL, l.harga_bulanan_idr",
+    "rating": "l.rating IS NULL, l.rating DESC",
+    "review": "l.jumlah_review IS NULL, l.jumlah_review DESC",
+}
+
+
+def _facility_labels(value):
+    """Fasilitas (dict kategori -> label, atau list lama) -> [(kategori, label)]."""
+    if isinstance(value, dict):
+        return [(category, str(label)) for category, labels in value.items() for label in labels or []]
+    if isinstance(value, list):
+        return [(None, str(label)) for label in value]
+    return []
+
+
+def _fts_query(text):
+    """Teks bebas -> query FTS5 aman: tiap kata di-quote dan dicocokkan sebagai prefix."""
+    words = [word.replace('"', "") for word in str(text).split()]
+    return " ".join(f'"{word}"*' for word in words if word)
+
+
+class ListingStore:
+    """
+    Store SQLite untuk query listing. Satu region = satu batch ingest dalam satu
+    transaksi (data lama region dihapus dulu), jadi ingest ulang selalu konsisten.
+    """
+
+    def __init__(self, db_path):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # --- Ingest ---
+
+    def _delete_region(self, region):
+        ids = "SELECT id FROM listings WHERE region = ?"
+        self.conn.execute(f"DELETE FROM listings_fts WHERE rowid IN ({ids})", (region,))
+        self.conn.execute(f"DELETE FROM facilities WHERE listing_id IN ({ids})", (region,))
+        self.conn.execute(f"DELETE FROM landmarks WHERE listing_id IN ({ids})", (region,))
+        self.conn.execute("DELETE FROM listings WHERE region = ?", (region,))
+
+    def ingest_region(self, region, records, sha256=""):
+        """Ganti semua listing satu region dengan records. Return jumlah record."""
+        records = [record for record in records if isinstance(record, dict)]
+        if records and "harga_bulanan_idr" not in records[0]:
+            from tools.normalize_utils import normalize_records
+
+            normalize_records(records)
+
+        with self.conn:
+            self._delete_region(region)
+            next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM listings").fetchone()[0]
+            listing_rows, facility_rows, landmark_rows, fts_rows = [], [], [], []
+            for listing_id, record in enumerate(records, start=next_id):
+                facilities = _facility_labels(record.get("fasilitas"))
+                landmarks = [lm for lm in record.get("landmarks") or [] if isinstance(lm, dict)]
+                listing_rows.append(
+                    (
+                        listing_id, region, record.get("area"), record.get("url"),
+                        record.get("nama_kos"), record.get("jenis_kos"), record.get("harga"),
+                        record.get("periode"), record.get("harga_idr"),
+                        record.get("harga_bulanan_idr"), record.get("rating_num"),
+                        record.get("jumlah_review_num"), record.get("total_transaksi_num"),
+                        record.get("alamat"), record.get("scraped_at"),
+                        json.dumps(record, ensure_ascii=False),
+                    )
+                )
+                facility_rows += [
+                    (listing_id, category, label.strip().lower()) for category, label in facilities
+                ]
+                landmark_rows += [(listing_id, lm.get("nama"), lm.get("jarak_m")) for lm in landmarks]
+                fts_rows.append(
+                    (
+                        listing_id,
+                        record.get("nama_kos") or "",
+                        record.get("alamat") or "",
+                        " ".join(label for _, label in facilities),
+                        " ".join(str(lm.get("nama") or "") for lm in landmarks),
+                    )
+                )
+            self.conn.executemany(
+                f"INSERT INTO listings VALUES ({', '.join('?' * 16)})", listing_rows
+            )
+            self.conn.executemany("INSERT INTO facilities VALUES (?, ?, ?)", facility_rows)
+            self.conn.executemany("INSERT INTO landmarks VALUES (?, ?, ?)", landmark_rows)
+            self.conn.executemany(
+                "INSERT INTO listings_fts (rowid, nama_kos, alamat, fasilitas, landmarks)"
+                " VALUES (?, ?, ?, ?, ?)",
+                fts_rows,
+            )
+            self.conn.execute(
+                "INSERT INTO ingested_regions (region, sha256, records, ingested_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(region) DO UPDATE SET sha256 = excluded.sha256,"
+                " records = excluded.records, ingested_at = excluded.ingested_at",
+                (region, sha256, len(records), datetime.now().isoformat()),
+            )
+        return len(records)
+
+    def ingest_regions(self, regions_folder, force=False):
+        """
+        Ingest semua region file; file yang hash-nya sama dengan ingest terakhir
+        dilewati kecuali force, region yang file-nya sudah tidak ada dihapus.
+        Return dict {ingested, skipped, removed, records}.
+        """
+        known = dict(self.conn.execute("SELECT region, sha256 FROM ingested_regions").fetchall())
+        stats = {"ingested": 0, "skipped": 0, "removed": 0, "records": 0}
+        if not os.path.isdir(regions_folder):
+            print(f"  X [Regions folder not found: {regions_folder}]")
+            return stats
+        current = set()
+        for name in sorted(os.listdir(regions_folder)):
+            if not name.endswith(".json"):
+                continue
+            region = name[: -len(".json")]
+            current.add(region)
+            region_file = os.path.join(regions_folder, name)
+            sha256 = file_sha256(region_file)
+            if not force and known.get(region) == sha256:
+                stats["skipped"] += 1
+                continue
+            try:
+                with open(region_file, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                if not isinstance(records, list):
+                    raise ValueError("Invalid format (expected list)")
+            except Exception as e:
+                print(f"    X [Error reading {region_file}: {e}]")
+                continue
+            count = self.ingest_region(region, records, sha256)
+            stats["ingested"] += 1
+            stats["records"] += count
+            print(f"    * [Ingested: {region} | {count} records]")
+        # Region yang file-nya dihapus tidak boleh tetap muncul di hasil query
+        for region in sorted(set(known) - current):
+            with self.conn:
+                self._delete_region(region)
+                self.conn.execute("DELETE FROM ingested_regions WHERE region = ?", (region,))
+            stats["removed"] += 1
+            print(f"    X [Removed: {region} | region file tidak ada]")
+        print(
+            f"  * [Ingest selesai: {stats['ingested']} region ({stats['records']} records),"
+            f" {stats['skipped']} region tidak berubah, {stats['removed']} region dihapus"
+            f" → {self.db_path}]"
+        )
+        return stats
+
+    # --- Query ---
+
+    def query(
+        self,
+        region=None,
+        area=None,
+        jenis_kos=None,
+        min_price=None,
+        max_price=None,
+        min_rating=None,
+        facilities=(),
+        near=None,
+        max_distance_m=None,
+        text=None,
+        sort="harga",
+        limit=50,
+    ):
+        """
+        Cari listing. Harga = harga per bulan (IDR). `facilities` dicocokkan persis
+        (case-insensitive) per label, `near` = potongan nama landmark (opsional
+        dengan max_distance_m), `text` = full-text di nama, alamat, fasilitas & landmark.
+
+        Returns:
+            list[dict]: Kolom RESULT_COLUMNS per listing
+        """
+        where, params = [], []
+        if region:
+            # Slug lengkap atau awalan sampai batas "-" (range, tetap pakai index region)
+            where.append("(l.region = ? OR (l.region >= ? AND l.region < ?))")
+            params.extend([region, f"{region}-", f"{region}."])
+        for column, value in (("area", area), ("jenis_kos", jenis_kos)):
+            if value:
+                where.append(f"l.{column} = ?")
+                params.append(value)
+        if min_price is not None:
+            where.append("l.harga_bulanan_idr >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            where.append("l.harga_bulanan_idr <= ?")
+            params.append(max_price)
+        if min_rating is not None:
+            where.append("l.rating >= ?")
+            params.append(min_rating)
+        for label in facilities or ():
+            where.append(
+                "EXISTS (SELECT 1 FROM facilities f WHERE f.label = ? AND f.listing_id = l.id)"
+            )
+            params.append(label.strip().lower())
+        if near or max_distance_m is not None:
+            clause = "SELECT 1 FROM landmarks m WHERE m.listing_id = l.id"
+            if near:
+                clause += " AND m.nama LIKE ?"
+                params.append(f"%{near}%")
+            if max_distance_m is not None:
+                clause += " AND m.jarak_m <= ?"
+                params.append(max_distance_m)
+            where.append(f"EXISTS ({clause})")
+        if text and _fts_query(text):
+            where.append("l.id IN (SELECT rowid FROM listings_fts WHERE listings_fts MATCH ?)")
+            params.append(_fts_query(text))
+
+        sql = f"SELECT {', '.join('l.' + c for c in RESULT_COLUMNS)} FROM listings l"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {SORT_COLUMNS.get(sort, SORT_COLUMNS['harga'])} LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def stats(self):
+        """Jumlah listing & harga median kasar per region (dari tabel ingest)."""
+        rows = self.conn.execute(
+            "SELECT region, COUNT(*) AS listings, MIN(harga_bulanan_idr) AS min_harga,"
+            " MAX(harga_bulanan_idr) AS max_harga, ROUND(AVG(rating), 2) AS avg_rating"
+            " FROM listings GROUP BY region ORDER BY region"
+        )
+        return [dict(row) for row in rows]
+
+
+def format_results(rows):
+    """Tabel teks ringkas untuk CLI."""
+    if not rows:
+        return "  (tidak ada hasil)"
+    lines = []
+    for row in rows:
+        harga = f"{row['harga_bulanan_idr']:,}".replace(",", ".") if row["harga_bulanan_idr"] else "-"
+        rating = row["rating"] if row["rating"] is not None else "-"
+        lines.append(
+            f"  > Rp{harga}/bln | ★ {rating} | {row['nama_kos']} | {row['area'] or row['region']}"
+            f"\n    {row['url']}"
+        )
+    return "\n".join(lines)
+
+
+def add_query_arguments(parser):
+    parser.add_argument(
+        "--region", default=None, help="Slug region atau awalannya, mis. yogyakarta"
+    )
+    parser.add_argument("--area", default=None)
+    parser.add_argument("--jenis", dest="jenis_kos", default=None, help="Putra / Putri / Campur")
+    parser.add_argument("--min-price", type=int, default=None, help="Harga per bulan minimal (IDR)")
+    parser.add_argument("--max-price", type=int, default=None, help="Harga per bulan maksimal (IDR)")
+    parser.add_argument("--min-rating", type=float, default=None)
+    parser.add_argument(
+        "--facility", dest="facilities", action="append", default=[], help="Bisa diulang: --facility AC"
+    )
+    parser.add_argument("--near", default=None, help="Potongan nama landmark, mis. kampus")
+    parser.add_argument("--max-distance", dest="max_distance_m", type=int, default=None, help="Meter")
+    parser.add_argument("--text", default=None, help="Full-text: nama, alamat, fasilitas, landmark")
+    parser.add_argument("--sort", choices=list(SORT_COLUMNS), default="harga")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+
+
+QUERY_FILTERS = [
+    "region", "area", "jenis_kos", "min_price", "max_price", "min_rating", "facilities",
+    "near", "max_distance_m", "text", "sort", "limit",
+]
+
+
+def run_query(args, db_path=None):
+    store = ListingStore(db_path or PATHS["query_db"])
+    try:
+        rows = store.query(**{key: getattr(args, key) for key in QUERY_FILTERS})
+    finally:
+        store.close()
+    print(json.dumps(rows, ensure_ascii=False, indent=2) if args.json else format_results(rows))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query engine lokal (SQLite) untuk data kos")
+    parser.add_argument("--db", default=PATHS["query_db"])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Load region file ke SQLite")
+    ingest_parser.add_argument("--regions-folder", default=PATHS["regions_folder"])
+    ingest_parser.add_argument("--force", action="store_true", help="Ingest ulang semua region")
+    add_query_arguments(subparsers.add_parser("query", help="Cari listing"))
+    subparsers.add_parser("stats", help="Ringkasan per region")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        store = ListingStore(args.db)
+        store.ingest_regions(args.regions_folder, force=args.force)
+        store.close()
+    elif args.command == "query":
+        run_query(args, args.db)
+    else:
+        store = ListingStore(args.db)
+        for row in store.stats():
+            print(f"  > {row}")
+        store.close()
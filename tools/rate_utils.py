@@ -0,0 +1,148 @@
+"""Rate controller terpusat (token bucket + AIMD) untuk semua navigasi & klik"""
+
+import time
+import random
+
+from tools.metrics_utils import incr, set_gauge
+
+
+class RateController:
+    """
+    Token bucket dengan rate (request/detik) yang diatur AIMD:
+    - sukses & latency normal -> rate naik `increase` (additive)
+    - timeout, HTTP 429/5xx, atau latency > latency_factor x baseline (dan > slow_latency
+      detik) -> rate dikali `decrease` (multiplicative), paling sering sekali per `cooldown` detik
+    Baseline latency = EWMA latency sukses. Jitter acak kecil ditambahkan ke tiap
+    tunggu supaya pola request tidak terlalu rata.
+    """
+
+    def __init__(
+        self,
+        initial_rate=1.0,
+        min_rate=0.2,
+        max_rate=4.0,
+        burst=1,
+        increase=0.05,
+        decrease=0.5,
+        latency_factor=2.0,
+        slow_latency=2.0,
+        cooldown=5.0,
+        jitter=0.2,
+        enabled=True,
+    ):
+        self.enabled = enabled
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.slow_latency = slow_latency
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.baseline_latency = None
+        self.successes = 0
+        self.backoffs = 0
+        self.waited = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**(config or {}))
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Tunggu sampai ada token, lalu pakai satu. Return lama menunggu (detik)."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        wait = 0.0
+        if self.tokens < 1:
+            wait = (1 - self.tokens) / self.rate
+            wait *= 1 + random.uniform(0, self.jitter)
+            time.sleep(wait)
+            self._refill()
+        self.tokens = max(0.0, self.tokens - 1)
+        self.waited += wait
+        return wait
+
+    def _set_rate(self, rate):
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        set_gauge("rate_rps", round(self.rate, 3), region="")
+
+    def on_success(self, latency=None):
+        """Request selesai normal; latency (detik) dipakai untuk deteksi site melambat."""
+        if not self.enabled:
+            return
+        if latency is not None:
+            baseline = self.baseline_latency
+            if (
+                baseline is not None
+                and latency > self.slow_latency
+                and latency > baseline * self.latency_factor
+            ):
+                self.on_error("slow")
+                return
+            self.baseline_latency = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+        self.successes += 1
+        self._set_rate(self.rate + self.increase)
+
+    def on_error(self, reason="error"):
+        """Timeout / throttle / latency naik: turunkan rate (maks sekali per cooldown)."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.backoffs += 1
+        self._set_rate(self.rate * self.decrease)
+        incr(f"rate_backoff_{reason}", region="")
+        print(f"    * [Rate backoff: {reason} | {self.rate:.2f} req/s]")
+
+    def check_response(self, response):
+        """
+        Cek Response navigasi Playwright; HTTP 429/5xx langsung memicu backoff.
+        Sukses tidak dicatat di sini (caller lapor on_success setelah halaman ter-render).
+
+        Returns:
+            int|None: Status HTTP jika site membatasi / error server, selain itu None
+        """
+        status = getattr(response, "status", None) if response is not None else None
+        if status is not None and (status == 429 or status >= 500):
+            self.on_error(f"http_{status}")
+            return status
+        return None
+
+    def snapshot(self):
+        return {
+            "enabled": self.enabled,
+            "rate_rps": round(self.rate, 3),
+            "baseline_latency": round(self.baseline_latency or 0.0, 3),
+            "successes": self.successes,
+            "backoffs": self.backoffs,
+            "waited_seconds": round(self.waited, 2),
+        }
+
+
+_rate_controller = [None]
+
+
+def configure_rate_controller(config):
+    """Buat ulang controller global dari SCRAPER_CONFIG["rate_control"]."""
+    _rate_controller[0] = RateController.from_config(config)
+    set_gauge("rate_rps", round(_rate_controller[0].rate, 3), region="")
+    return _rate_controller[0]
+
+
+def get_rate_controller():
+    if _rate_controller[0] is None:
+        _rate_controller[0] = RateController(enabled=False)
+    return _rate_controller[0]
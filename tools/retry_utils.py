@@ -0,0 +1,202 @@
+"""
+Retry queue per URL listing: klasifikasi error, exponential backoff + jitter,
+dan dead-letter file (data/failed/<region>_failed.json) yang bisa di-replay
+lewat `python scraper.py retry-failed`.
+"""
+
+import os
+import json
+import time
+import random
+from datetime import datetime
+
+from tools.metrics_utils import incr
+
+# Kelas error yang tidak ada gunanya di-retry di run yang sama
+PERMANENT_ERRORS = ("invalid", "http_4xx")
+
+
+def classify_error(error):
+    """
+    Kelompokkan error scraping card:
+    timeout / selector_missing / navigation / throttled / http_4xx / http_5xx / invalid / other
+    """
+    message = str(error)
+    name = type(error).__name__
+    if isinstance(error, ValueError):
+        return "invalid"
+    if message.startswith("HTTP "):
+        status = message.split()[1]
+        if status == "429":
+            return "throttled"
+        return "http_4xx" if status.startswith("4") else "http_5xx"
+    # Timeout dicek dulu: pesan timeout goto juga memuat "navigating to ..."
+    if "Timeout" in name or "Timeout" in message:
+        # Playwright: timeout tunggu selector = elemen tidak muncul (markup / render)
+        if "waiting for locator" in message or "waiting for selector" in message:
+            return "selector_missing"
+        return "timeout"
+    if "net::ERR_" in message or "navigating to" in message or "Navigation" in message:
+        return "navigation"
+    return "other"
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+class RetryQueue:
+    """
+    Antrian card gagal per URL. Tiap gagal, jadwal retry berikutnya =
+    min(max_delay, base_delay * factor^(attempts-1)) dengan jitter +-jitter.
+    Entry yang jatuh tempo dalam batch_window detik diambil bersama supaya
+    retry tetap jalan concurrent. Entry yang attempts-nya habis atau error-nya
+    permanen masuk dead letter.
+    """
+
+    def __init__(
+        self,
+        region,
+        max_attempts=2,
+        base_delay=2.0,
+        factor=2.0,
+        max_delay=60.0,
+        jitter=0.5,
+        batch_window=1.0,
+    ):
+        self.region = region
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.batch_window = batch_window
+        self.pending = {}  # url -> entry (menunggu retry)
+        self.dead = {}  # url -> entry (dead letter)
+        self.succeeded = []
+
+    @classmethod
+    def from_config(cls, region, config, max_attempts=None):
+        config = dict(config or {})
+        if max_attempts is not None:
+            config["max_attempts"] = max_attempts
+        return cls(region, **config)
+
+    def backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * self.factor ** max(0, attempts - 1))
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def fail(self, url, error, idx=None, attempts=None):
+        """Catat kegagalan url; jadwalkan retry atau pindahkan ke dead letter."""
+        entry = self.pending.pop(url, None) or self.dead.pop(url, None) or {
+            "url": url,
+            "region": self.region,
+            "idx": idx,
+            "attempts": 0,
+            "first_failed_at": _now(),
+        }
+        entry["attempts"] = attempts if attempts is not None else entry["attempts"] + 1
+        entry["error_class"] = classify_error(error)
+        entry["error"] = str(error)
+        entry["last_failed_at"] = _now()
+        incr(f"card_error_{entry['error_class']}")
+        if entry["error_class"] in PERMANENT_ERRORS or entry["attempts"] >= self.max_attempts:
+            entry.pop("next_at", None)
+            self.dead[url] = entry
+        else:
+            entry["next_at"] = time.monotonic() + self.backoff(entry["attempts"])
+            self.pending[url] = entry
+        return entry
+
+    def requeue(self, entries):
+        """
+        Masukkan entry dead letter untuk dicoba lagi sekarang (replay). Attempts
+        dihitung ulang per replay; jumlah replay dicatat di entry.
+        """
+        now = time.monotonic()
+        for entry in entries:
+            entry = dict(entry, attempts=0, next_at=now)
+            entry["replays"] = entry.get("replays", 0) + 1
+            self.pending[entry["url"]] = entry
+
+    def success(self, url):
+        self.pending.pop(url, None)
+        self.dead.pop(url, None)
+        self.succeeded.append(url)
+
+    def take_due(self):
+        """
+        Tunggu sampai ada entry yang jatuh tempo, lalu ambil semua yang sudah due.
+        Return list (idx, url); kosong jika antrian habis.
+        """
+        if not self.pending:
+            return []
+        wait = min(entry["next_at"] for entry in self.pending.values()) - time.monotonic()
+        if wait > 0:
+            if wait >= 0.1:
+                print(f"    * [Retry backoff: {wait:.1f}s | {len(self.pending)} cards]")
+            time.sleep(wait)
+        cutoff = time.monotonic() + self.batch_window
+        due = [entry for entry in self.pending.values() if entry["next_at"] <= cutoff]
+        return [(entry["idx"], entry["url"]) for entry in due]
+
+    def __len__(self):
+        return len(self.pending)
+
+    def dead_letters(self):
+        """Entry dead letter + entry yang belum sempat di-retry (mis. retry dihentikan)."""
+        entries = list(self.dead.values())
+        for entry in self.pending.values():
+            entries.append({k: v for k, v in entry.items() if k != "next_at"})
+        return entries
+
+
+def dead_letter_path(failed_cards_folder, region):
+    return f"{failed_cards_folder}/{region}_failed.json"
+
+
+def save_dead_letters(entries, region, failed_cards_folder):
+    """Tulis dead letter region (atomic); hapus file jika sudah tidak ada entry."""
+    path = dead_letter_path(failed_cards_folder, region)
+    if not entries:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    os.makedirs(failed_cards_folder, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    print(f"      * [Failed cards saved: {path}]")
+    return path
+
+
+def load_dead_letters(failed_cards_folder, region):
+    """
+    Entry dead letter region. Format lama ({idx, url, error}) tetap terbaca
+    sebagai entry dengan attempts 0.
+    """
+    path = dead_letter_path(failed_cards_folder, region)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    result = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and entry.get("url"):
+            entry.setdefault("region", region)
+            entry.setdefault("attempts", 0)
+            result[entry["url"]] = entry
+    return list(result.values())
+
+
+def dead_letter_regions(failed_cards_folder):
+    """Region yang punya dead letter file, urut nama."""
+    if not os.path.isdir(failed_cards_folder):
+        return []
+    return sorted(
+        name[: -len("_failed.json")]
+        for name in os.listdir(failed_cards_folder)
+        if name.endswith("_failed.json")
+    )
@@ -0,0 +1,261 @@
+"""
+Scheduler region: urutan kerja dari manifest stats per region di crawl state
+(last scrape, records, cards/jam, failure rate) + antrian region bersama
+(SQLite) yang di-pull worker paralel, jadi region lambat tidak menahan yang cepat.
+"""
+
+import os
+import sqlite3
+import statistics
+from datetime import datetime
+
+from tools.config import SCRAPER_CONFIG, PATHS
+from tools.state_utils import CrawlState
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS region_queue (
+    run_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker_id INTEGER,
+    claimed_at TEXT,
+    finished_at TEXT,
+    PRIMARY KEY (run_id, region)
+);
+CREATE INDEX IF NOT EXISTS idx_region_queue_status ON region_queue (run_id, status, position);
+"""
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _age_hours(timestamp, now):
+    if not timestamp:
+        return None
+    try:
+        return (now - datetime.fromisoformat(timestamp)).total_seconds() / 3600
+    except ValueError:
+        return None
+
+
+def region_is_complete(manifest, threshold, refresh_after_hours=None, now=None):
+    """
+    Region lengkap (skip) jika completed dengan records > threshold, dan belum
+    lebih tua dari refresh_after_hours (None = tidak pernah di-refresh otomatis).
+    """
+    if manifest is None or manifest["status"] != "completed" or manifest["records"] <= threshold:
+        return False
+    if refresh_after_hours is None:
+        return True
+    age = _age_hours(manifest.get("last_scraped_at"), now or datetime.now())
+    return age is not None and age < refresh_after_hours
+
+
+def expected_yield(manifest):
+    """Record/jam yang diharapkan = cards_per_hour x (1 - failure_rate); None jika belum ada stats."""
+    if not manifest or manifest.get("cards_per_hour") is None:
+        return None
+    return manifest["cards_per_hour"] * (1 - (manifest.get("failure_rate") or 0.0))
+
+
+class RegionScheduler:
+    """
+    Urutkan region: in_progress (resume) dulu, lalu skor staleness x yield.
+    staleness = umur scrape terakhir / stale_after_hours (maks 1; belum pernah = 1),
+    yield = expected_yield relatif ke median semua region (belum ada stats = 1).
+    Region lengkap di-skip cukup dari manifest, tanpa buka file region.
+    """
+
+    def __init__(
+        self,
+        crawl_state,
+        completed_threshold,
+        stale_after_hours=168,
+        refresh_after_hours=None,
+        min_staleness=0.05,
+    ):
+        self.crawl_state = crawl_state
+        self.completed_threshold = completed_threshold
+        self.stale_after_hours = stale_after_hours
+        self.refresh_after_hours = refresh_after_hours
+        self.min_staleness = min_staleness
+
+    @classmethod
+    def from_config(cls, crawl_state, config, completed_threshold):
+        config = {k: v for k, v in (config or {}).items() if k != "enabled"}
+        return cls(crawl_state, completed_threshold, **config)
+
+    def staleness(self, manifest, now):
+        age = _age_hours((manifest or {}).get("last_scraped_at"), now)
+        if age is None:
+            return 1.0
+        return min(1.0, max(self.min_staleness, age / self.stale_after_hours))
+
+    def priority(self, manifest, median_yield, now):
+        region_yield = expected_yield(manifest)
+        ratio = region_yield / median_yield if region_yield is not None and median_yield else 1.0
+        return self.staleness(manifest, now) * ratio
+
+    def plan(self, region_list, force=False):
+        """
+        Returns:
+            tuple: (urutan region yang dikerjakan, region yang di-skip karena lengkap)
+        """
+        now = datetime.now()
+        manifests = self.crawl_state.region_manifests()
+        yields = [
+            y for y in (expected_yield(manifests.get(r)) for r in region_list) if y is not None
+        ]
+        median_yield = statistics.median(yields) if yields else None
+
+        skipped, resume, pending = [], [], []
+        for region in region_list:
+            manifest = manifests.get(region)
+            if not force and region_is_complete(
+                manifest, self.completed_threshold, self.refresh_after_hours, now
+            ):
+                skipped.append(region)
+            elif manifest is not None and manifest["status"] == "in_progress":
+                resume.append(region)
+            else:
+                pending.append(region)
+        # sorted() stabil: skor sama -> urutan input tetap
+        pending = sorted(
+            pending, key=lambda r: -self.priority(manifests.get(r), median_yield, now)
+        )
+        return resume + pending, skipped
+
+
+def plan_regions(region_list, force=False, config=None):
+    """Urutkan region_list pakai manifest di crawl state (SCRAPER_CONFIG["scheduler"])."""
+    config = SCRAPER_CONFIG.get("scheduler", {}) if config is None else config
+    if not config.get("enabled", True):
+        return list(region_list), []
+    crawl_state = CrawlState(PATHS["crawl_state_db"])
+    try:
+        scheduler = RegionScheduler.from_config(
+            crawl_state, config, SCRAPER_CONFIG["completed_region_threshold"]
+        )
+        ordered, skipped = scheduler.plan(region_list, force=force)
+    finally:
+        crawl_state.close()
+    if skipped:
+        print(f"  X [Skip {len(skipped)} completed regions (manifest)]")
+    print(f"  * [Scheduled {len(ordered)} regions | stalest & highest yield first]")
+    return ordered, skipped
+
+
+class RegionQueue:
+    """
+    Antrian region satu run (tabel region_queue di DB crawl state). Worker
+    claim region berikutnya secara atomik (BEGIN IMMEDIATE), jadi worker yang
+    selesai duluan langsung ambil region lain.
+    """
+
+    def __init__(self, db_path, run_id):
+        self.db_path = db_path
+        self.run_id = run_id
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(QUEUE_SCHEMA)
+
+    @staticmethod
+    def new_run_id():
+        return f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+    def close(self):
+        self.conn.close()
+
+    def fill(self, region_list):
+        """Isi antrian sesuai urutan; antrian run lama yang sudah habis ikut dibersihkan."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "DELETE FROM region_queue WHERE run_id != ? AND run_id NOT IN"
+                " (SELECT run_id FROM region_queue WHERE status != 'done')",
+                (self.run_id,),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO region_queue (run_id, region, position) VALUES (?, ?, ?)",
+                [(self.run_id, region, position) for position, region in enumerate(region_list)],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, worker_id):
+        """Ambil region queued berikutnya untuk worker ini; None jika antrian habis."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT region FROM region_queue WHERE run_id = ? AND status = 'queued'"
+                " ORDER BY position LIMIT 1",
+                (self.run_id,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE region_queue SET status = 'claimed', worker_id = ?, claimed_at = ?"
+                    " WHERE run_id = ? AND region = ?",
+                    (worker_id, _now(), self.run_id, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def finish(self, region):
+        self.conn.execute(
+            "UPDATE region_queue SET status = 'done', finished_at = ? WHERE run_id = ? AND region = ?",
+            (_now(), self.run_id, region),
+        )
+
+    def iter_claims(self, worker_id):
+        """
+        Generator region untuk scrape_mamikos_single: region ditandai done saat
+        worker minta region berikutnya (region yang sedang jalan saat crash tetap claimed).
+        """
+        while True:
+            region = self.claim(worker_id)
+            if region is None:
+                return
+            yield region
+            self.finish(region)
+
+    def unfinished(self):
+        """Region yang belum done: list (region, status, worker_id)."""
+        return self.conn.execute(
+            "SELECT region, status, worker_id FROM region_queue"
+            " WHERE run_id = ? AND status != 'done' ORDER BY position",
+            (self.run_id,),
+        ).fetchall()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from regions import regions
+
+    parser = argparse.ArgumentParser(description="Lihat urutan region dari manifest scheduler")
+    parser.add_argument("--region", default=None, help="Daftar region dipisahkan koma (default: semua)")
+    parser.add_argument("--force", action="store_true", help="Jangan skip region lengkap")
+    parser.add_argument("--limit", type=int, default=20, help="Jumlah region teratas yang ditampilkan")
+    args = parser.parse_args()
+
+    region_list = [r.strip() for r in args.region.split(",") if r.strip()] if args.region else regions
+    ordered, skipped = plan_regions(region_list, force=args.force)
+    crawl_state = CrawlState(PATHS["crawl_state_db"])
+    manifests = crawl_state.region_manifests()
+    crawl_state.close()
+    for position, region in enumerate(ordered[: args.limit]):
+        manifest = manifests.get(region) or {}
+        print(
+            f"{position:>4}  {region}  | {manifest.get('status', 'new')}"
+            f" | last: {manifest.get('last_scraped_at') or '-'}"
+            f" | cards/h: {manifest.get('cards_per_hour') or '-'}"
+            f" | fail: {manifest.get('failure_rate') if manifest.get('failure_rate') is not None else '-'}"
+        )
@@ -1,156 +1,324 @@
-import os
 import json
 import time
-import random
 from datetime import datetime
-import glob
+from collections import deque
+from contextlib import closing
 
+from tools.metrics_utils import span, incr, observe
+from tools.rate_utils import get_rate_controller
+from tools.net_utils import get_connectivity_monitor
 
-def backup_region(region_results, region, backup_round, backup_folder):
-    """Backup otomatis data region setiap interval tertentu."""
-    os.makedirs(backup_folder, exist_ok=True)  # Ensure folder exists
-    backup_path = f"{backup_folder}/{region}_{backup_round}.json"
-    with open(backup_path, "w", encoding="utf-8") as f:
-        json.dump(region_results, f, ensure_ascii=False, indent=2)
-    print(f"      * [Data Backup: Round {backup_round}]")
 
+def make_dedup_key(room_data):
+    """Key dedup listing: (nama_kos, area, alamat) yang sudah di-normalize."""
+    return (
+        (room_data.get("nama_kos") or "").strip().lower(),
+        (room_data.get("area") or "").strip().lower(),
+        (room_data.get("alamat") or "").strip().lower(),
+    )
 
-def save_region(region_results, region, regions_folder):
-    """Simpan data region setelah selesai scraping."""
-    os.makedirs(regions_folder, exist_ok=True)  # Ensure folder exists
-    region_path = f"{regions_folder}/{region}.json"
-    with open(region_path, "w", encoding="utf-8") as f:
-        json.dump(region_results, f, ensure_ascii=False, indent=2)
-    print(f"      * [Save Data Region: {region}]")
+
+def is_duplicate(dedup_key, region, seen_keys, dedup_index=None):
+    """
+    Duplikat jika sudah terlihat di run ini, atau sudah dimiliki region lain
+    di dedup index persisten.
+    """
+    if dedup_key in seen_keys:
+        return True
+    if dedup_index is not None:
+        return dedup_index.key_owner(dedup_key) not in (None, region)
+    return False
+
+
+def load_previous_records(region_path):
+    """Record region file sebelumnya, di-index per URL (kosong jika file tidak ada/rusak)."""
+    try:
+        with open(region_path, "r", encoding="utf-8") as f:
+            existing_data = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(existing_data, list):
+        return {}
+    return {r["url"]: r for r in existing_data if isinstance(r, dict) and r.get("url")}
+
+
+def open_card_detail(url, tab, timeout=15000, rate=None):
+    """
+    Navigasi tab detail ke URL listing (lewat rate controller). Cukup tunggu
+    sampai response ter-commit, sisa load-nya jalan di browser sambil tab lain
+    dinavigasi. HTTP 4xx/5xx langsung jadi error (tidak perlu menunggu timeout);
+    429/5xx sekaligus memicu backoff rate controller.
+    """
+    if not url:
+        raise ValueError("Detail URL not found on card")
+    rate = rate or get_rate_controller()
+    rate.acquire()
+    response = tab.goto(url, wait_until="commit", timeout=timeout)
+    status = rate.check_response(response)
+    if status is None and response is not None and 400 <= (response.status or 0) < 500:
+        # Listing hilang / ditolak (404, 403, ...): error permanen, tidak di-retry
+        status = response.status
+    if status is not None:
+        raise RuntimeError(f"HTTP {status} on detail page")
+    return tab
+
+
+def advance_detail_slot(slot, scroll_pause, section_selectors, step_timeout, rate):
+    """
+    Majukan satu tab detail tanpa blocking (dipanggil berulang oleh pool):
+    render -> tunggu judul kos muncul (maks render_deadline), sections -> scroll
+    bertahap ke tiap posisi scroll_pause dan cek section lazy-load yang belum ada
+    di DOM (maks step_timeout ms per posisi, total dibatasi sections_deadline).
+    Section yang memang tidak ada di listing cukup kena deadline, bukan error.
+
+    Returns:
+        bool: True jika tab siap diekstrak atau error (slot["error"] terisi).
+    """
+    tab = slot["tab"]
+    now = time.monotonic()
+    if slot["stage"] == "render":
+        if tab.query_selector(slot["render_selector"]) is None:
+            if now < slot["render_deadline"]:
+                return False
+            raise TimeoutError(
+                f"Timeout {slot['render_timeout']}ms exceeded waiting for selector"
+                f" {slot['render_selector']}"
+            )
+        observe("detail_render", now - slot["committed"])
+        rate.on_success(now - slot["committed"])
+        slot["stage"] = "sections"
+        slot["pending"] = list(section_selectors)
+        slot["rendered"] = now
+        slot["sections_deadline"] = now + slot["section_deadline"] / 1000
+        slot["scroll_index"] = -1
+        slot["step_deadline"] = now
+
+    if slot["pending"] and now >= slot["step_deadline"]:
+        slot["scroll_index"] += 1
+        if slot["scroll_index"] >= len(scroll_pause) or now >= slot["sections_deadline"]:
+            slot["pending"] = []
+        else:
+            tab.evaluate(
+                f"window.scrollTo(0, document.body.scrollHeight*{scroll_pause[slot['scroll_index']]})"
+            )
+            slot["step_deadline"] = min(slot["sections_deadline"], now + step_timeout / 1000)
+    slot["pending"] = [s for s in slot["pending"] if tab.query_selector(s) is None]
+    if slot["pending"]:
+        return False
+    observe("detail_sections", time.monotonic() - slot["rendered"])
+    return True
 
 
-def save_failed_cards(failed_cards_info, region, failed_cards_folder):
-    """Simpan info card yang tetap gagal setelah retry ke file khusus."""
-    os.makedirs(failed_cards_folder, exist_ok=True)
-    failed_path = f"{failed_cards_folder}/{region}_failed.json"
-    with open(failed_path, "w", encoding="utf-8") as f:
-        json.dump(failed_cards_info, f, ensure_ascii=False, indent=2)
-    print(f"      * [Failed cards saved: {failed_path}]")
+# Field room_data -> key SELECTORS yang diambil sebagai text tunggal
+DETAIL_TEXT_FIELDS = {
+    "nama_kos": "room_name",
+    "jenis_kos": "gender",
+    "area": "area",
+    "rating": "rating",
+    "jumlah_review": "review_count",
+    "total_transaksi": "transaction_count",
+    "harga": "price",
+    "periode": "period",
+    "alamat": "address",
+}
 
 
-def generate_master_file(regions_folder, data_dir, master_file):
+def extract_card_detail(new_page, selectors, parse_utils, url=None):
     """
-    Generate master file dari semua region files yang ada.
-    Ini memastikan master file selalu up-to-date tanpa data loss.
+    Ambil semua field dari tab detail yang sudah ter-load, return room_data dict.
+    url = URL card dari list page (key crawl state / journal / fingerprint); dipakai
+    sebagai room_data["url"] walau halaman detail redirect / menambah query param.
     """
-    os.makedirs(data_dir, exist_ok=True)  # Ensure folder exists
-    
-    all_data = []
-    region_files = glob.glob(f"{regions_folder}/*.json")
-    
-    print(f"\n  * [Generating master file from {len(region_files)} region files...]")
-    
-    for region_file in region_files:
-        try:
-            with open(region_file, "r", encoding="utf-8") as f:
-                region_data = json.load(f)
-                if isinstance(region_data, list):
-                    all_data.extend(region_data)
-                    region_name = os.path.basename(region_file).replace('.json', '')
-                    print(f"    * [Added {len(region_data)} records from {region_name}]")
-                else:
-                    print(f"    X [Invalid format in {region_file}]")
-        except Exception as e:
-            print(f"    X [Error reading {region_file}: {e}]")
-    
-    # Save master file
-    master_path = f"{data_dir}/{master_file}"
-    with open(master_path, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"  * [Master file generated: {len(all_data)} total records → {master_path}]")
-    return len(all_data)
-
-
-def scrape_card_detail(card, page, scroll_pause, selectors, parse_utils):
-    """Scrape detail satu card, return room_data dict."""
-    safe_get_text = parse_utils.safe_get_text
-    safe_get_list = parse_utils.safe_get_list
-    smart_kategorisasi = parse_utils.smart_kategorisasi
-    extract_landmarks = parse_utils.extract_landmarks
-
-    with page.context.expect_page(timeout=10000) as new_page_info:
-        card.click()
-    new_page = new_page_info.value
-    new_page.wait_for_load_state("networkidle", timeout=10000)
-
-    for scroll_pos in scroll_pause:
-        new_page.evaluate(
-            f"window.scrollTo(0, document.body.scrollHeight*{scroll_pos})"
-        )
-        time.sleep(random.uniform(1, 2))
+    list_keys = parse_utils.LIST_SELECTOR_KEYS
+    detail_selectors = {
+        key: selectors[key] for key in list(DETAIL_TEXT_FIELDS.values()) + list(list_keys)
+    }
+    with span("extract_fields"):
+        extracted = parse_utils.batch_extract(new_page, detail_selectors, list_keys)
 
     room_data = {
-        "nama_kos": safe_get_text(new_page, selectors["room_name"]),
-        "jenis_kos": safe_get_text(new_page, selectors["gender"]),
-        "area": safe_get_text(new_page, selectors["area"]),
-        "rating": safe_get_text(new_page, selectors["rating"]),
-        "jumlah_review": safe_get_text(new_page, selectors["review_count"]),
-        "total_transaksi": safe_get_text(new_page, selectors["transaction_count"]),
-        "harga": safe_get_text(new_page, selectors["price"]),
-        "periode": safe_get_text(new_page, selectors["period"]),
-        "alamat": safe_get_text(new_page, selectors["address"]),
+        field: extracted[key] for field, key in DETAIL_TEXT_FIELDS.items()
     }
-    fasilitas_list = safe_get_list(new_page, selectors["facilities"])
-    room_data["fasilitas"] = smart_kategorisasi(fasilitas_list)
-    room_data["peraturan"] = safe_get_list(new_page, selectors["rules"])
-    room_data["landmarks"] = extract_landmarks(new_page)
-    room_data["url"] = new_page.url
+    fasilitas_list = [text for text in extracted["facilities"] if text]
+    with span("categorize"):
+        room_data["fasilitas"] = parse_utils.smart_kategorisasi(fasilitas_list)
+    room_data["peraturan"] = [text for text in extracted["rules"] if text]
+    room_data["landmarks"] = parse_utils.pair_landmarks(
+        extracted["landmark_names"], extracted["landmark_distances"]
+    )
+    room_data["url"] = url or new_page.url
     room_data["scraped_at"] = datetime.now().isoformat()
-    new_page.close()
     return room_data
 
 
+def scrape_cards_concurrent(
+    indexed_urls,
+    detail_tabs,
+    scroll_pause,
+    selectors,
+    parse_utils,
+    scraper_config=None,
+    before_batch=None,
+):
+    """
+    Scrape detail card lewat URL langsung dengan pool tab long-lived.
+    Tiap tab jalan sendiri: begitu card-nya selesai diekstrak (atau gagal), tab
+    itu langsung dinavigasi ke URL berikutnya, jadi satu tab lambat tidak
+    menahan tab lain. Tab yang sedang load di-poll bergiliran (detail_poll_interval).
+    before_batch(jumlah_card, idle) dipanggil sebelum tiap navigasi; idle=True
+    jika tidak ada tab yang sedang load (boleh mengganti isi detail_tabs, mis.
+    BrowserManager me-restart browser). Return False = tahan pengisian tab
+    sampai pool idle.
+
+    Yields:
+        tuple: (idx, url, room_data, error) sesuai urutan selesai.
+               room_data None jika error tidak None.
+    """
+    config = scraper_config or {}
+    page_timeout = config.get("page_timeout", 15000)
+    load_timeout = config.get("load_timeout", 10000)
+    step_timeout = config.get("section_step_timeout", 2000)
+    poll_ms = config.get("detail_poll_interval", 50)
+    rate = get_rate_controller()
+    monitor = get_connectivity_monitor()
+    section_selectors = [
+        selectors[key] for key in config.get("lazy_sections", []) if key in selectors
+    ]
+    queue = deque(indexed_urls)
+    free_tabs = list(range(len(detail_tabs)))
+    active = []
+
+    while queue or active:
+        # Isi tab yang kosong; koneksi putus -> pause dulu (tanpa probe saat sehat)
+        while queue and free_tabs:
+            monitor.wait_until_healthy()
+            if before_batch is not None and before_batch(1, idle=not active) is False and active:
+                break
+            idx, url = queue.popleft()
+            slot = {
+                "idx": idx,
+                "url": url,
+                "tab_index": free_tabs.pop(0),
+                "error": None,
+                "stage": "render",
+                "render_selector": selectors["room_name"],
+                "render_timeout": load_timeout,
+                "section_deadline": config.get("section_deadline", 6000),
+            }
+            slot["tab"] = detail_tabs[slot["tab_index"]]
+            try:
+                with span("detail_open"):
+                    open_card_detail(url, slot["tab"], page_timeout, rate)
+                slot["committed"] = time.monotonic()
+                slot["render_deadline"] = slot["committed"] + load_timeout / 1000
+            except Exception as e:
+                slot["error"] = e
+                if "Timeout" in type(e).__name__:
+                    rate.on_error("timeout")
+                monitor.report_error(e)
+            active.append(slot)
+
+        # Halaman dianggap ter-render begitu judul kos muncul (pengganti networkidle)
+        finished = []
+        for slot in active:
+            if slot["error"] is None:
+                try:
+                    if not advance_detail_slot(
+                        slot, scroll_pause, section_selectors, step_timeout, rate
+                    ):
+                        continue
+                except Exception as e:
+                    slot["error"] = e
+                    if slot["stage"] == "render":
+                        rate.on_error("timeout")
+            finished.append(slot)
+
+        if not finished:
+            active[0]["tab"].wait_for_timeout(poll_ms)
+            continue
+
+        for slot in finished:
+            active.remove(slot)
+            free_tabs.append(slot["tab_index"])
+            if slot["error"] is not None:
+                incr("cards_failed")
+                yield slot["idx"], slot["url"], None, slot["error"]
+                continue
+            try:
+                with span("extract"):
+                    room_data = extract_card_detail(
+                        slot["tab"], selectors, parse_utils, slot["url"]
+                    )
+            except Exception as e:
+                incr("cards_failed")
+                yield slot["idx"], slot["url"], None, e
+                continue
+            yield slot["idx"], slot["url"], room_data, None
+
+
 def retry_failed_cards(
-    failed_cards,
-    page,
+    retry_queue,
+    detail_tabs,
     scroll_pause,
     selectors,
     parse_utils,
     dedup,
     seen_keys,
     region_results,
-    region,
-    backup_interval,
-    backup_round,
-    backup_folder,
+    journal,
     duplicate_exit_threshold,
+    scraper_config=None,
+    dedup_index=None,
+    before_batch=None,
 ):
-    """Retry scraping card yang gagal, update region_results dan backup jika berhasil."""
-    failed_cards_info = []
+    """
+    Retry card di RetryQueue sampai antrian habis: tunggu backoff, scrape semua
+    card yang sudah jatuh tempo sekaligus (concurrent), lalu yang sukses masuk
+    region_results & journal, yang gagal dijadwalkan ulang / masuk dead letter.
+    """
     duplicate_count = 0
-    for idx, card in failed_cards:
-        try:
-            room_data = scrape_card_detail(
-                card, page, scroll_pause, selectors, parse_utils
-            )
-            dedup_key = (
-                room_data["nama_kos"].strip().lower(),
-                room_data["area"].strip().lower(),
-                room_data["alamat"].strip().lower(),
+    while len(retry_queue):
+        due = retry_queue.take_due()
+        print(f"Retrying {len(due)} failed cards")
+        with closing(
+            scrape_cards_concurrent(
+                due,
+                detail_tabs,
+                scroll_pause,
+                selectors,
+                parse_utils,
+                scraper_config,
+                before_batch,
             )
-            if dedup and dedup_key in seen_keys:
-                print(
-                    f"    X [DUPLICATE: {room_data['nama_kos']} ({room_data['area']} - {room_data['alamat']})]"
-                )
-                duplicate_count += 1
-                if duplicate_count > duplicate_exit_threshold:
-                    print(
-                        "    X [Terlalu banyak duplikat, scraping region dihentikan!]"
-                    )
-                    break
-                continue
-            seen_keys.add(dedup_key)
-            region_results.append(room_data)
-            print(f"    - Scraped data for kos: {room_data['nama_kos']}")
-            if len(region_results) % backup_interval == 0:
-                backup_round += 1
-                backup_region(region_results, region, backup_round, backup_folder)
-        except Exception as e:
-            failed_cards_info.append({"idx": idx, "error": str(e)})
-    return failed_cards_info, backup_round
+        ) as card_results:
+            for idx, url, room_data, error in card_results:
+                if error is not None:
+                    retry_queue.fail(url, error, idx)
+                    continue
+                try:
+                    dedup_key = make_dedup_key(room_data)
+                    if dedup and is_duplicate(dedup_key, journal.region, seen_keys, dedup_index):
+                        incr("duplicates")
+                        print(
+                            f"    X [DUPLICATE: {room_data['nama_kos']} ({room_data['area']} - {room_data['alamat']})]"
+                        )
+                        retry_queue.success(url)
+                        duplicate_count += 1
+                        if duplicate_count > duplicate_exit_threshold:
+                            # Sisa antrian tetap tercatat di dead letter
+                            print(
+                                "    X [Terlalu banyak duplikat, scraping region dihentikan!]"
+                            )
+                            return retry_queue.dead_letters()
+                        continue
+                    seen_keys.add(dedup_key)
+                    if dedup and dedup_index is not None:
+                        dedup_index.add(journal.region, dedup_key, url)
+                    region_results.append(room_data)
+                    journal.append(room_data)
+                    retry_queue.success(url)
+                    incr("cards_scraped")
+                    print(f"    - Scraped data for kos: {room_data['nama_kos']}")
+                except Exception as e:
+                    retry_queue.fail(url, e, idx)
+    return retry_queue.dead_letters()
@@ -1,5 +1,8 @@
 """Utility functions for handling dynamic selectors"""
 
+import hashlib
+
+
 def detect_room_card_selector(page, selectors, timeout=10000):
     """
     Deteksi selector room card yang tepat untuk region ini.
@@ -36,15 +39,69 @@ def detect_room_card_selector(page, selectors, timeout=10000):
     # Semua gagal
     return None
 
-def get_room_cards(page, selector):
+def get_room_card_summaries(page, selector, selectors):
     """
-    Ambil semua room cards menggunakan selector yang sudah terdeteksi.
-    
-    Args:
-        page: Playwright page object
-        selector: CSS selector yang sudah terdeteksi
-    
+    Ambil ringkasan semua room card dalam satu kali evaluate: URL detail plus
+    field murah dari markup list page (nama, harga, rating) untuk fingerprint.
+    Link dicari di card itu sendiri, ancestor terdekat, lalu descendant.
+
     Returns:
-        list: List of card elements
+        list: dict {url, name, price, rating, text} per card
+              (url string kosong jika card tidak punya link)
     """
-    return page.locator(selector).all()
\ No newline at end of file
+    return page.locator(selector).evaluate_all(
+        """(cards, sel) => {
+            const textOf = (card, s) => {
+                const el = s ? card.querySelector(s) : null;
+                return el ? (el.innerText || "").trim() : "";
+            };
+            return cards.map((card) => {
+                const link = card.matches(sel.link)
+                    ? card
+                    : card.closest(sel.link) || card.querySelector(sel.link);
+                return {
+                    url: link ? link.href : "",
+                    name: textOf(card, sel.name),
+                    price: textOf(card, sel.price),
+                    rating: textOf(card, sel.rating),
+                    text: (card.innerText || "").replace(/\\s+/g, " ").trim(),
+                };
+            });
+        }""",
+        {
+            "link": selectors["room_card_link"],
+            "name": selectors.get("card_name"),
+            "price": selectors.get("card_price"),
+            "rating": selectors.get("card_rating"),
+        },
+    )
+
+
+def card_fingerprint(summary):
+    """
+    Fingerprint murah satu card dari list page. Pakai nama/harga/rating kalau
+    selector-nya ketemu, kalau tidak pakai seluruh text card.
+    """
+    fields = [summary.get("name", ""), summary.get("price", ""), summary.get("rating", "")]
+    if not any(fields):
+        fields = [summary.get("text", "")]
+    payload = "\x1f".join([summary.get("url", "")] + [f.lower() for f in fields])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def wait_for_card_count(page, selector, previous_count, timeout=10000):
+    """
+    Tunggu sampai jumlah card bertambah dari previous_count (habis klik load more).
+
+    Returns:
+        int: Jumlah card terbaru (sama dengan previous_count jika timeout)
+    """
+    try:
+        page.wait_for_function(
+            "([sel, n]) => document.querySelectorAll(sel).length > n",
+            arg=[selector, previous_count],
+            timeout=timeout,
+        )
+    except Exception:
+        pass
+    return page.locator(selector).count()
@@ -0,0 +1,199 @@
+"""
+Situs lokal mirip mamikos untuk uji scraper tanpa internet: template halaman
+listing (card via XHR + link load more) dan detail, plus handler HTTP-nya.
+Isi data datang dari "site" (sumber data), mis. StubSite (payload rekaman,
+tools.stub_server) atau FixtureSite (data sintetis, bench.fixture_site).
+
+Sumber data menyediakan:
+    list_path, card_testid
+    listing_payload(region, page, host) -> payload JSON listing (yang di-capture)
+    listing_cards(region, page, host)   -> (list card {url, name, price, rating}, has_more)
+    detail_page(path, host)             -> (status, html) atau None jika tidak ada
+    before_request()                    -> opsional, mis. delay & hitung request
+"""
+
+import json
+import html
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Endpoint internal halaman listing (card siap render); bukan bagian dari site asli
+CARDS_PATH = "/site/cards"
+
+LISTING_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Local listing</title></head>
+<body>
+<div id="list"></div>
+<a class="list__content-load-link" href="#" style="display:none">Lihat lebih banyak</a>
+<script>
+const REGION = __REGION__;
+const CARD_TESTID = __CARD_TESTID__;
+let page = 0;
+const link = document.querySelector(".list__content-load-link");
+async function loadPage() {
+    page += 1;
+    const query = "?region=" + encodeURIComponent(REGION) + "&page=" + page;
+    // Payload listing asli (yang ditangkap mode capture), lalu card siap render
+    await fetch("__LIST_PATH__" + query);
+    const result = await (await fetch("__CARDS_PATH__" + query)).json();
+    const list = document.getElementById("list");
+    for (const c of result.cards) {
+        const div = document.createElement("div");
+        div.setAttribute("data-testid", CARD_TESTID);
+        div.innerHTML = '<a href="' + c.url + '" target="_blank">'
+            + '<span class="rc-info__name"></span> <span class="rc-price__text"></span>'
+            + ' <span class="rc-overview__rating"></span></a>';
+        div.querySelector(".rc-info__name").textContent = c.name;
+        div.querySelector(".rc-price__text").textContent = c.price;
+        div.querySelector(".rc-overview__rating").textContent = c.rating;
+        list.appendChild(div);
+    }
+    if (result.has_more) {
+        link.style.display = "";
+    } else {
+        link.remove();
+    }
+}
+link.addEventListener("click", (e) => { e.preventDefault(); loadPage(); });
+loadPage();
+</script>
+</body></html>
+"""
+
+DETAIL_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{name}</title></head>
+<body>
+<h1 class="detail-title__room-name">{name}</h1>
+<div class="detail-kost-overview__gender-box">{gender}</div>
+<span class="detail-kost-overview__area-text">{area}</span>
+<span class="detail-kost-overview__rating-text">{rating}</span>
+<span class="detail-kost-overview__rating-review">({reviews} review)</span>
+<span class="detail-kost-overview__total-transaction-text">{transactions} transaksi berhasil</span>
+<span class="rc-price__text">{price}</span><span class="rc-price__type">/ bulan</span>
+<div id="lazy"></div>
+<template id="sections">
+<div id="detailKostLocation"><p class="bg-c-text--body-4">{address}</p></div>
+{facilities}
+{rules}
+{landmarks}
+</template>
+<script>
+setTimeout(() => {{
+    document.getElementById("lazy").appendChild(
+        document.getElementById("sections").content.cloneNode(true)
+    );
+}}, {section_delay_ms});
+</script>
+</body></html>
+"""
+
+
+def render_listing_page(region, card_testid, list_path):
+    body = LISTING_PAGE.replace("__REGION__", json.dumps(region))
+    body = body.replace("__CARD_TESTID__", json.dumps(card_testid))
+    body = body.replace("__CARDS_PATH__", CARDS_PATH)
+    return body.replace("__LIST_PATH__", list_path)
+
+
+def render_detail_page(
+    name,
+    price,
+    rating,
+    gender="Campur",
+    area="",
+    reviews=0,
+    transactions=0,
+    address="",
+    facilities=(),
+    rules=(),
+    landmarks=(),
+    section_delay_ms=0,
+):
+    """HTML detail dengan markup sesuai SELECTORS; landmarks = [(nama, jarak)]."""
+    return DETAIL_PAGE.format(
+        name=html.escape(name),
+        gender=html.escape(gender),
+        area=html.escape(area),
+        rating=html.escape(str(rating)),
+        reviews=reviews,
+        transactions=transactions,
+        price=html.escape(price),
+        address=html.escape(address),
+        facilities="\n".join(
+            f'<div class="detail-kost-facility-item__label">{html.escape(f)}</div>'
+            for f in facilities
+        ),
+        rules="\n".join(
+            f'<div class="detail-kost-rule-item__label">{html.escape(r)}</div>' for r in rules
+        ),
+        landmarks="\n".join(
+            f'<div class="landmark-item__text-ellipsis">{html.escape(landmark)}</div>'
+            f'<div class="landmark-item__landmark-distance">{html.escape(distance)}</div>'
+            for landmark, distance in landmarks
+        ),
+        section_delay_ms=section_delay_ms,
+    )
+
+
+def make_handler(site):
+    class SiteHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            data = body.encode("utf-8") if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_HEAD(self):
+            # Probe monitor koneksi (HEAD): cukup status, tanpa body
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            region = query.get("region", [""])[0]
+            page = int(query.get("page", ["1"])[0])
+            host = self.headers.get("Host", "127.0.0.1")
+            if parsed.path == CARDS_PATH:
+                # Endpoint internal: tanpa delay / hitungan request site
+                cards, has_more = site.listing_cards(region, page, host)
+                body = json.dumps({"cards": cards, "has_more": has_more}, ensure_ascii=False)
+                self._send(200, body, "application/json")
+                return
+            if hasattr(site, "before_request"):
+                site.before_request()
+            parts = [unquote(p) for p in parsed.path.split("/") if p]
+            if parsed.path == site.list_path:
+                payload = site.listing_payload(region, page, host)
+                if not isinstance(payload, str):
+                    payload = json.dumps(payload, ensure_ascii=False)
+                self._send(200, payload, "application/json")
+            elif len(parts) >= 2 and parts[0] == "cari":
+                body = render_listing_page(parts[1], site.card_testid, site.list_path)
+                self._send(200, body, "text/html; charset=utf-8")
+            else:
+                detail = site.detail_page(parsed.path, host)
+                if detail is None:
+                    self._send(404, "not found", "text/plain")
+                else:
+                    status, body = detail
+                    content_type = "text/html; charset=utf-8" if status == 200 else "text/plain"
+                    self._send(status, body, content_type)
+
+    return SiteHandler
+
+
+def start_site_server(site, host="127.0.0.1", port=0):
+    """Jalankan server situs lokal di background thread. Return (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,233 @@
+"""Crawl state per listing (SQLite) untuk checkpoint & resume level card"""
+
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    region TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (region, url)
+);
+CREATE INDEX IF NOT EXISTS idx_listings_status ON listings (region, status);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    region TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (region, url)
+);
+CREATE TABLE IF NOT EXISTS regions (
+    region TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# Kolom manifest stats per region (ditambahkan ke tabel regions DB lama saat dibuka)
+REGION_STATS_COLUMNS = {
+    "last_scraped_at": "TEXT",
+    "duration_sec": "REAL",
+    "cards": "INTEGER",
+    "failed": "INTEGER",
+    "cards_per_hour": "REAL",
+    "failure_rate": "REAL",
+}
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+class CrawlState:
+    """
+    Status crawl per (region, url): pending / done / skipped / failed + attempts & timestamp,
+    plus status & stats per region (manifest scheduler) untuk keputusan skip.
+    Aman dipakai beberapa proses worker sekaligus (WAL + busy timeout).
+    """
+
+    def __init__(self, db_path):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(regions)")}
+        for column, column_type in REGION_STATS_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE regions ADD COLUMN {column} {column_type}")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # --- Region ---
+
+    def region_status(self, region):
+        """Return (status, records) atau None jika region belum pernah tercatat."""
+        return self.conn.execute(
+            "SELECT status, records FROM regions WHERE region = ?", (region,)
+        ).fetchone()
+
+    def set_region_status(self, region, status, records=0):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO regions (region, status, records, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(region) DO UPDATE SET status = excluded.status,"
+                " records = excluded.records, updated_at = excluded.updated_at",
+                (region, status, records, _now()),
+            )
+
+    def record_region_run(self, region, cards, failed, duration_sec):
+        """
+        Simpan stats run region (manifest scheduler): waktu scrape, cards/jam
+        dan failure rate. cards = card yang di-scrape run ini (tanpa record
+        recovered / refresh fingerprint). Dipanggil setelah region selesai.
+        """
+        attempted = cards + failed
+        with self.conn:
+            self.conn.execute(
+                "UPDATE regions SET last_scraped_at = ?, duration_sec = ?, cards = ?, failed = ?,"
+                " cards_per_hour = ?, failure_rate = ? WHERE region = ?",
+                (
+                    _now(),
+                    round(duration_sec, 1),
+                    cards,
+                    failed,
+                    round(cards / duration_sec * 3600, 1) if duration_sec > 0 else None,
+                    round(failed / attempted, 4) if attempted else 0.0,
+                    region,
+                ),
+            )
+
+    def region_manifest(self, region):
+        """Baris manifest satu region (status, records, stats run terakhir) atau None."""
+        cursor = self.conn.execute("SELECT * FROM regions WHERE region = ?", (region,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def region_manifests(self):
+        """Semua baris manifest region (satu query), region -> dict."""
+        cursor = self.conn.execute("SELECT * FROM regions")
+        columns = [column[0] for column in cursor.description]
+        return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+    def backfill_region(self, region, region_path):
+        """
+        Region file lama (sebelum ada crawl state): baca sekali lalu catat
+        sebagai completed, berikutnya cukup lookup di tabel.
+        """
+        if not os.path.exists(region_path):
+            return None
+        with open(region_path, "r", encoding="utf-8") as f:
+            existing_data = json.load(f)
+        if not isinstance(existing_data, list):
+            return None
+        self.set_region_status(region, "completed", len(existing_data))
+        return self.region_manifest(region)
+
+    def reset_region(self, region):
+        """Mulai region dari nol (run baru / --force)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM listings WHERE region = ?", (region,))
+        self.set_region_status(region, "in_progress")
+
+    # --- Listing ---
+
+    def add_pending(self, region, urls):
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO listings (region, url, status, created_at, updated_at)"
+                " VALUES (?, ?, 'pending', ?, ?)",
+                [(region, url, now, now) for url in urls if url],
+            )
+
+    def done_urls(self, region):
+        return {
+            row[0]
+            for row in self.conn.execute(
+                "SELECT url FROM listings WHERE region = ? AND status = 'done'", (region,)
+            )
+        }
+
+    def remaining(self, region, urls):
+        """URL yang belum done / skipped (pending/failed/baru), urutan input dipertahankan."""
+        finished = {
+            row[0]
+            for row in self.conn.execute(
+                "SELECT url FROM listings WHERE region = ? AND status IN ('done', 'skipped')",
+                (region,),
+            )
+        }
+        return [url for url in urls if url not in finished]
+
+    def mark_done(self, region, urls):
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE listings SET status = 'done', attempts = attempts + 1,"
+                " last_error = NULL, updated_at = ? WHERE region = ? AND url = ?",
+                [(now, region, url) for url in urls if url],
+            )
+
+    def mark_skipped(self, region, urls, reason):
+        """Listing yang sengaja tidak di-scrape (mis. sudah dimiliki region lain)."""
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE listings SET status = 'skipped', last_error = ?, updated_at = ?"
+                " WHERE region = ? AND url = ?",
+                [(reason, now, region, url) for url in urls if url],
+            )
+
+    def mark_failed(self, region, url, error):
+        if not url:
+            return
+        with self.conn:
+            self.conn.execute(
+                "UPDATE listings SET status = 'failed', attempts = attempts + 1,"
+                " last_error = ?, updated_at = ? WHERE region = ? AND url = ?",
+                (str(error), _now(), region, url),
+            )
+
+    # --- Fingerprint list page (tidak ikut dihapus reset_region) ---
+
+    def get_fingerprints(self, region):
+        return dict(
+            self.conn.execute(
+                "SELECT url, fingerprint FROM fingerprints WHERE region = ?", (region,)
+            ).fetchall()
+        )
+
+    def save_fingerprints(self, region, fingerprints):
+        now = _now()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO fingerprints (region, url, fingerprint, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(region, url) DO UPDATE SET fingerprint = excluded.fingerprint,"
+                " updated_at = excluded.updated_at",
+                [(region, url, fp, now) for url, fp in fingerprints.items() if url],
+            )
+
+    def counts(self, region):
+        """Jumlah listing per status untuk satu region."""
+        return dict(
+            self.conn.execute(
+                "SELECT status, COUNT(*) FROM listings WHERE region = ? GROUP BY status",
+                (region,),
+            ).fetchall()
+        )
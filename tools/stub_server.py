@@ -0,0 +1,122 @@
+"""
+Stub server lokal yang memutar ulang payload JSON listing hasil rekaman
+(mode capture + record) untuk uji scraper tanpa internet.
+
+Contoh:
+    python -m tools.stub_server --payloads data/capture --region <region> --port 8765
+lalu set SCRAPER_CONFIG["base_url"] = "http://127.0.0.1:8765/cari".
+"""
+
+import os
+import json
+import glob
+import argparse
+import threading
+from urllib.parse import urlparse
+
+from tools.config import SCRAPER_CONFIG
+from tools.capture_utils import parse_listing_payload
+from tools.site_utils import render_detail_page, start_site_server
+
+
+def load_recorded_payloads(payloads_folder):
+    """Payload rekaman satu region (payload_001.json, ...) sesuai urutan halaman."""
+    pages = []
+    for path in sorted(glob.glob(f"{payloads_folder}/payload_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(json.load(f))
+    return pages
+
+
+class StubSite:
+    """
+    Sumber data tools.site_utils dari payload rekaman satu region: payload mentah
+    per halaman + ringkasan card hasil parse (region di URL diabaikan).
+    """
+
+    card_testid = "roomCard"
+
+    def __init__(self, payloads, capture_config=None, list_path=None):
+        self.payloads = payloads
+        self.capture_config = capture_config or SCRAPER_CONFIG["listing_capture"]
+        self.list_path = list_path or self.capture_config["url_patterns"][0]
+        self.base_url = "http://stub.local"
+        self.cards = [
+            parse_listing_payload(payload, self.capture_config, self.base_url)
+            for payload in payloads
+        ]
+        # Detail page di-index per path URL (host stub diganti host server asli)
+        self.details = {
+            urlparse(card["url"]).path: card for page in self.cards for card in page
+        }
+        # Origin asli di payload (mis. https://mamikos.com) diarahkan ke stub
+        self.origins = {
+            f"{urlparse(card['url']).scheme}://{urlparse(card['url']).netloc}"
+            for page in self.cards
+            for card in page
+        } - {self.base_url}
+
+    def listing_payload(self, region, page, host):
+        if not 1 <= page <= len(self.payloads):
+            return "{}"
+        body = json.dumps(self.payloads[page - 1], ensure_ascii=False)
+        for origin in self.origins:
+            body = body.replace(origin, f"http://{host}")
+        return body
+
+    def listing_cards(self, region, page, host):
+        if not 1 <= page <= len(self.cards):
+            return [], False
+        cards = [
+            dict(card, url=f"http://{host}{urlparse(card['url']).path}")
+            for card in self.cards[page - 1]
+        ]
+        return cards, page < len(self.cards)
+
+    def detail_page(self, path, host):
+        card = self.details.get(path)
+        if card is None:
+            return None
+        return 200, render_detail_page(
+            card["name"],
+            card["price"],
+            card["rating"],
+            area="Stub Area",
+            address="Jl. Stub No. 1",
+            facilities=["WiFi"],
+            rules=["Tidak boleh bawa hewan"],
+            landmarks=[("Kampus Stub", "1,2 km")],
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub server payload listing rekaman")
+    parser.add_argument(
+        "--payloads", default="data/capture", help="Folder rekaman (berisi satu folder per region)"
+    )
+    parser.add_argument("--region", default=None, help="Region yang diputar ulang (subfolder --payloads)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    payloads_folder = f"{args.payloads}/{args.region}" if args.region else args.payloads
+    if not os.path.isdir(payloads_folder):
+        print(f"  X [Payload folder not found: {payloads_folder}]")
+        raise SystemExit(1)
+    payloads = load_recorded_payloads(payloads_folder)
+    if not payloads:
+        recorded = sorted(
+            name for name in os.listdir(payloads_folder)
+            if os.path.isdir(f"{payloads_folder}/{name}")
+        )
+        print(f"  X [No payload_*.json in {payloads_folder}; pilih satu region dengan --region]")
+        if recorded:
+            print(f"    Region terekam: {', '.join(recorded)}")
+        raise SystemExit(1)
+    site = StubSite(payloads)
+    server, base_url = start_site_server(site, args.host, args.port)
+    print(f"  * [Stub server: {base_url}/cari | {len(site.payloads)} pages]")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
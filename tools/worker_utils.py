@@ -0,0 +1,135 @@
+"""Multi-process scraping: worker pull region dari antrian bersama, tiap worker punya profil browser & output sendiri"""
+
+import os
+import sys
+import json
+import time
+import multiprocessing
+from datetime import datetime
+
+from tools.config import BROWSER_CONFIG, PATHS
+from tools.scheduler_utils import RegionQueue
+
+
+def worker_profile_dir(user_data_dir, worker_id):
+    """Folder profil browser khusus worker, supaya Chromium tidak rebutan lock profil."""
+    return f"{user_data_dir}_w{worker_id}"
+
+
+def _worker_paths(worker_id, workers_folder):
+    log_path = f"{workers_folder}/worker_{worker_id}.log"
+    result_path = f"{workers_folder}/worker_{worker_id}.json"
+    return log_path, result_path
+
+
+def _run_worker(worker_id, queue_db, run_id, scrape_kwargs, browser_config, workers_folder):
+    """Entry point proses worker: scrape region dari antrian sampai habis lalu tulis ringkasan hasil."""
+    log_path, result_path = _worker_paths(worker_id, workers_folder)
+    log_file = open(log_path, "a", encoding="utf-8", buffering=1)
+    sys.stdout = log_file
+    sys.stderr = log_file
+
+    # Spawn = proses baru, jadi override config dari parent (mis. --head) dipasang ulang
+    BROWSER_CONFIG.update(browser_config)
+    BROWSER_CONFIG["user_data_dir"] = worker_profile_dir(
+        browser_config["user_data_dir"], worker_id
+    )
+    # Metrics per proses, jadi tiap worker menulis report sendiri
+    PATHS["metrics_report"] = f"{workers_folder}/metrics_{worker_id}.json"
+    PATHS["metrics_prom"] = f"{workers_folder}/metrics_{worker_id}.prom"
+
+    from scraper import scrape_mamikos_single
+
+    started = time.time()
+    print(f"# Worker {worker_id} started | Run: {run_id} | {datetime.now().isoformat()}")
+    queue = RegionQueue(queue_db, run_id)
+    try:
+        region_stats = scrape_mamikos_single(queue.iter_claims(worker_id), **scrape_kwargs)
+    finally:
+        queue.close()
+
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "worker_id": worker_id,
+                "regions": [stat["region"] for stat in region_stats],
+                "region_stats": region_stats,
+                "duration_sec": round(time.time() - started, 1),
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    print(f"# Worker {worker_id} done")
+    log_file.flush()
+
+
+def run_workers(region_list, workers, scrape_kwargs, workers_folder=None):
+    """
+    Jalankan scraping region di beberapa proses paralel. region_list (sudah
+    diurutkan scheduler) diisi ke antrian bersama di DB crawl state; tiap worker
+    claim region berikutnya begitu region sebelumnya selesai.
+
+    Returns:
+        list: Hasil per worker (regions, exitcode, region_stats, duration_sec)
+    """
+    workers_folder = workers_folder or PATHS["workers_folder"]
+    os.makedirs(workers_folder, exist_ok=True)
+    workers = max(1, min(workers, len(region_list)))
+    queue_db = PATHS["crawl_state_db"]
+    os.makedirs(os.path.dirname(queue_db) or ".", exist_ok=True)
+    queue = RegionQueue(queue_db, RegionQueue.new_run_id())
+    queue.fill(region_list)
+    ctx = multiprocessing.get_context("spawn")
+
+    print(f"  * [Starting {workers} workers for {len(region_list)} regions | Run: {queue.run_id}]")
+    processes = []
+    for worker_id in range(workers):
+        _, result_path = _worker_paths(worker_id, workers_folder)
+        if os.path.exists(result_path):
+            os.remove(result_path)  # Jangan sampai hasil run lama terbaca sebagai sukses
+        process = ctx.Process(
+            target=_run_worker,
+            args=(
+                worker_id,
+                queue_db,
+                queue.run_id,
+                scrape_kwargs,
+                dict(BROWSER_CONFIG),
+                workers_folder,
+            ),
+            name=f"scraper-worker-{worker_id}",
+        )
+        process.start()
+        print(f"    * [Worker {worker_id} | PID {process.pid}]")
+        processes.append((worker_id, process))
+
+    results = []
+    for worker_id, process in processes:
+        process.join()
+        log_path, result_path = _worker_paths(worker_id, workers_folder)
+        result = {"worker_id": worker_id, "regions": [], "exitcode": process.exitcode}
+        try:
+            with open(result_path, "r", encoding="utf-8") as f:
+                result.update(json.load(f))
+        except Exception:
+            result["region_stats"] = []
+        if process.exitcode == 0:
+            print(
+                f"    * [Worker {worker_id} done | {len(result['regions'])} regions"
+                f" | {result.get('duration_sec', '?')}s]"
+            )
+        else:
+            print(f"    X [Worker {worker_id} failed | Exit code: {process.exitcode} | Log: {log_path}]")
+        results.append(result)
+
+    # Region yang tidak selesai (worker crash saat region itu jalan / antrian tidak habis)
+    unfinished = queue.unfinished()
+    queue.close()
+    if unfinished:
+        print(
+            f"    X [{len(unfinished)} regions not finished: "
+            + ", ".join(f"{region} ({status})" for region, status, _ in unfinished[:10])
+            + "]"
+        )
+    return results